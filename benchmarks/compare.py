@@ -0,0 +1,80 @@
+"""
+Сравнивает два отчёта run.py и ищет регрессии.
+
+Регрессия — рост p95 или падение пропускной способности больше порога,
+а также любой рост максимального числа SQL-запросов или появление
+ошибок. При регрессиях скрипт завершается с кодом 1.
+
+    python -m benchmarks.compare before.json after.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def find_regressions(old, new, threshold):
+    """Описания регрессий в сценариях, которые есть в обоих отчётах."""
+    regressions = []
+    for project, scenarios in new.items():
+        for name, after in scenarios.items():
+            before = old.get(project, {}).get(name)
+            if before is None:
+                continue
+            old_p95 = before['latency_ms']['p95']
+            new_p95 = after['latency_ms']['p95']
+            if new_p95 > old_p95 * (1 + threshold):
+                regressions.append(f'{name}: p95 {old_p95} → {new_p95} мс')
+            old_rps = before['throughput_rps']
+            new_rps = after['throughput_rps']
+            if new_rps < old_rps * (1 - threshold):
+                regressions.append(
+                    f'{name}: пропускная способность '
+                    f'{old_rps} → {new_rps} запросов/с'
+                )
+            old_queries = before['queries']['max']
+            new_queries = after['queries']['max']
+            if None not in (old_queries, new_queries) and (
+                new_queries > old_queries
+            ):
+                regressions.append(
+                    f'{name}: SQL-запросов {old_queries} → {new_queries}'
+                )
+            if after['errors'] > before['errors']:
+                regressions.append(
+                    f'{name}: ошибок {before["errors"]} → {after["errors"]}'
+                )
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='Допустимое относительное ухудшение задержки и пропускной '
+             'способности.',
+    )
+    options = parser.parse_args(args)
+    regressions = find_regressions(
+        load_results(options.before),
+        load_results(options.after),
+        options.threshold,
+    )
+    for regression in regressions:
+        print(regression)
+    if regressions:
+        sys.exit(1)
+    print('Регрессий не найдено.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Многопоточный генератор HTTP-нагрузки и сводка по его замерам."""
+import http.client
+import re
+import statistics
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+class Response:
+
+    def __init__(self, status, headers, body, elapsed):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+
+    @property
+    def queries(self):
+        """Число SQL-запросов из заголовка Server-Timing."""
+        match = QUERIES_RE.search(self.headers.get('Server-Timing', ''))
+        return int(match.group(1)) if match else None
+
+
+class Client:
+    """
+    HTTP-клиент одного виртуального пользователя.
+
+    Держит постоянное соединение и cookie; редиректы не проходит,
+    чтобы замер относился только к запрошенной странице.
+    """
+
+    def __init__(self, host, port, cookies=None):
+        self.host = host
+        self.port = port
+        self.cookies = dict(cookies or {})
+        self.connection = None
+
+    def request(self, method, path, data=None):
+        headers = {}
+        body = None
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()
+            )
+        if data is not None:
+            body = urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        try:
+            response = self.send(method, path, body, headers)
+        except (http.client.HTTPException, ConnectionError):
+            # Сервер мог закрыть соединение между запросами.
+            self.close()
+            response = self.send(method, path, body, headers)
+        content = response.read()
+        elapsed = time.perf_counter() - start
+        for header in response.headers.get_all('Set-Cookie') or ():
+            cookie = SimpleCookie(header)
+            self.cookies.update(
+                (name, morsel.value) for name, morsel in cookie.items()
+            )
+        if response.will_close:
+            self.close()
+        return Response(response.status, response.headers, content, elapsed)
+
+    def send(self, method, path, body, headers):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=30
+            )
+        self.connection.request(method, path, body, headers)
+        return self.connection.getresponse()
+
+    def get_csrf_token(self, path):
+        """Токен CSRF из формы на странице, как его получает браузер."""
+        response = self.request('GET', path)
+        match = CSRF_INPUT_RE.search(response.body.decode())
+        if match is None:
+            raise RuntimeError(f'На странице {path} нет формы с CSRF.')
+        return match.group(1)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def percentile(sorted_values, share):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * share))
+    return sorted_values[index]
+
+
+def summarize(responses, elapsed):
+    """Задержки, пропускная способность и число SQL-запросов сценария."""
+    latencies = sorted(response.elapsed * 1000 for response in responses)
+    queries = [
+        response.queries for response in responses
+        if response.queries is not None
+    ]
+    return {
+        'requests': len(responses),
+        'errors': sum(response.status >= 400 for response in responses),
+        'throughput_rps': round(len(responses) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'max': round(latencies[-1], 2),
+        },
+        'queries': {
+            'mean': round(statistics.mean(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+    }
+
+
+def run_scenario(clients, scenario, requests_count, warmup=0):
+    """
+    Прогоняет сценарий в отдельном потоке на каждого клиента.
+
+    `scenario(client, number)` отправляет один запрос и возвращает
+    Response. Первые `warmup` запросов каждого потока не учитываются.
+    """
+    per_client = max(1, requests_count // len(clients))
+    results = [[] for _ in clients]
+    barrier = threading.Barrier(len(clients) + 1)
+
+    def worker(client, responses):
+        try:
+            for number in range(warmup):
+                scenario(client, number)
+        except Exception:
+            barrier.abort()
+            raise
+        barrier.wait()
+        for number in range(warmup, warmup + per_client):
+            responses.append(scenario(client, number))
+
+    threads = [
+        threading.Thread(target=worker, args=(client, responses))
+        for client, responses in zip(clients, results)
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return summarize(
+        [response for responses in results for response in responses],
+        elapsed,
+    )
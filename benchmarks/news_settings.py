@@ -0,0 +1,12 @@
+"""Настройки YaNews для нагрузочных тестов: отдельная база из BENCHMARK_DB."""
+import os
+
+from yanews.settings import *  # noqa: F401,F403
+from yanews.settings import DATABASES
+
+DATABASES['default']['NAME'] = os.environ['BENCHMARK_DB']
+
+# Число запросов в отчёте берётся из заголовка Server-Timing.
+QUERY_BUDGET_ENABLED = True
+
+COMMENT_WRITE_BEHIND = os.environ.get('BENCHMARK_WRITE_BEHIND') == '1'
@@ -0,0 +1,10 @@
+"""Настройки YaNote для нагрузочных тестов: отдельная база из BENCHMARK_DB."""
+import os
+
+from yanote.settings import *  # noqa: F401,F403
+from yanote.settings import DATABASES
+
+DATABASES['default']['NAME'] = os.environ['BENCHMARK_DB']
+
+# Число запросов в отчёте берётся из заголовка Server-Timing.
+QUERY_BUDGET_ENABLED = True
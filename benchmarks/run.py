@@ -0,0 +1,284 @@
+"""
+Нагрузочный тест YaNews и YaNote.
+
+Для каждого проекта создаёт временную базу, наполняет её через seed.py,
+запускает runserver в отдельном процессе и гоняет сценарии в несколько
+потоков. Итог — JSON с задержками p50/p95/p99, пропускной способностью
+и числом SQL-запросов по каждому сценарию; два таких файла сравнивает
+compare.py.
+
+    python -m benchmarks.run --output before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.loadgen import Client, run_scenario
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+PROJECTS = {
+    'news': ROOT_DIR / 'ya_news',
+    'note': ROOT_DIR / 'ya_note',
+}
+HOST = '127.0.0.1'
+SERVER_START_TIMEOUT = 30
+
+
+class Scenario:
+    """Запрос сценария и подготовка к нему клиента."""
+
+    def __init__(self, name, request, authenticated=False, setup=None):
+        self.name = name
+        self.request = request
+        self.authenticated = authenticated
+        self.setup = setup
+
+
+def news_scenarios(paths):
+    detail_paths = paths['detail']
+
+    def detail_path(client, number):
+        return detail_paths[(client.offset + number) % len(detail_paths)]
+
+    def get_detail_token(client):
+        client.csrf_token = client.get_csrf_token(detail_paths[0])
+
+    return (
+        Scenario(
+            'news:home',
+            lambda client, number: client.request('GET', paths['home']),
+        ),
+        Scenario(
+            'news:detail',
+            lambda client, number: client.request(
+                'GET', detail_path(client, number)
+            ),
+        ),
+        Scenario(
+            'news:detail POST',
+            lambda client, number: client.request(
+                'POST', detail_path(client, number), {
+                    'text': f'Комментарий {number}',
+                    'csrfmiddlewaretoken': client.csrf_token,
+                }
+            ),
+            authenticated=True,
+            setup=get_detail_token,
+        ),
+    )
+
+
+def note_scenarios(paths):
+
+    def get_add_token(client):
+        client.csrf_token = client.get_csrf_token(paths['add'])
+
+    return (
+        Scenario(
+            'notes:list',
+            lambda client, number: client.request('GET', paths['list']),
+            authenticated=True,
+        ),
+        Scenario(
+            'notes:add',
+            lambda client, number: client.request('POST', paths['add'], {
+                'title': f'Заметка {client.offset}-{number}',
+                'text': 'Текст заметки',
+                'csrfmiddlewaretoken': client.csrf_token,
+            }),
+            authenticated=True,
+            setup=get_add_token,
+        ),
+    )
+
+
+SCENARIOS = {'news': news_scenarios, 'note': note_scenarios}
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Сервер завершился при запуске.')
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Сервер не начал слушать порт {port}.')
+
+
+def project_env(project, database, options):
+    env = dict(os.environ)
+    env.update(
+        DJANGO_SETTINGS_MODULE=f'benchmarks.{project}_settings',
+        DJANGO_PRODUCTION='1',
+        BENCHMARK_DB=str(database),
+        BENCHMARK_WRITE_BEHIND='1' if options.write_behind else '0',
+        PYTHONPATH=os.pathsep.join((str(ROOT_DIR), str(PROJECTS[project]))),
+    )
+    return env
+
+
+def prepare_database(project, env, workdir, options):
+    """Применяет миграции и наполняет базу; возвращает манифест seed.py."""
+    manage = [sys.executable, 'manage.py']
+    subprocess.run(
+        [*manage, 'migrate', '-v', '0'],
+        cwd=PROJECTS[project], env=env, check=True,
+    )
+    manifest = workdir / 'manifest.json'
+    subprocess.run(
+        [
+            sys.executable, '-m', 'benchmarks.seed', project,
+            '--manifest', str(manifest),
+            '--news', str(options.news),
+            '--comments', str(options.comments),
+            '--users', str(options.users),
+            '--notes', str(options.notes),
+            '--seed', str(options.seed),
+        ],
+        cwd=ROOT_DIR, env=env, check=True,
+    )
+    return json.loads(manifest.read_text(encoding='utf-8'))
+
+
+def make_clients(port, manifest, scenario, options):
+    clients = []
+    for index in range(options.threads):
+        cookies = None
+        if scenario.authenticated:
+            sessions = manifest['sessions']
+            cookies = sessions[index % len(sessions)]
+        client = Client(HOST, port, cookies)
+        client.offset = random.Random(options.seed + index).randrange(10 ** 6)
+        if scenario.setup is not None:
+            scenario.setup(client)
+        clients.append(client)
+    return clients
+
+
+def run_project(project, options):
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        env = project_env(project, workdir / 'db.sqlite3', options)
+        manifest = prepare_database(project, env, workdir, options)
+        port = get_free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable, 'manage.py', 'runserver', '--noreload',
+                f'{HOST}:{port}',
+            ],
+            cwd=PROJECTS[project], env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port, server)
+            results = {}
+            for scenario in SCENARIOS[project](manifest['paths']):
+                clients = make_clients(port, manifest, scenario, options)
+                results[scenario.name] = run_scenario(
+                    clients,
+                    scenario.request,
+                    options.requests,
+                    options.warmup,
+                )
+                for client in clients:
+                    client.close()
+                print(
+                    f'{scenario.name}: {results[scenario.name]}',
+                    file=sys.stderr,
+                )
+            return results
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def get_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--projects', nargs='+', choices=PROJECTS, default=list(PROJECTS)
+    )
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument(
+        '--requests', type=int, default=400,
+        help='Запросов на сценарий, не считая прогрева.',
+    )
+    parser.add_argument(
+        '--warmup', type=int, default=5,
+        help='Неучитываемых запросов в каждом потоке перед замером.',
+    )
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument(
+        '--comments', type=int, default=20, help='Комментариев на новость.'
+    )
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument(
+        '--notes', type=int, default=100, help='Заметок на пользователя.'
+    )
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument(
+        '--write-behind', action='store_true',
+        help='Комментарии YaNews пишутся фоновым потоком пачками.',
+    )
+    parser.add_argument(
+        '--output', help='Файл для JSON с результатами; иначе stdout.'
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_args(args)
+    report = {
+        'meta': {
+            'revision': get_revision(),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'options': {
+                name: value for name, value in vars(options).items()
+                if name != 'output'
+            },
+        },
+        'results': {
+            project: run_project(project, options)
+            for project in options.projects
+        },
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if options.output:
+        Path(options.output).write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Наполняет базу проекта данными для нагрузочного теста.
+
+Запускается из run.py с DJANGO_SETTINGS_MODULE, указывающим на настройки
+из этого пакета. Данные зависят только от --seed, поэтому два прогона
+с одинаковыми параметрами работают с одинаковой базой. Результат —
+манифест в JSON: cookie сессий пользователей и адреса страниц для сценариев.
+"""
+import argparse
+import io
+import json
+import os
+import random
+from datetime import timedelta
+
+import django
+
+WORDS = (
+    'город', 'новость', 'погода', 'дождь', 'солнце', 'выборы', 'футбол',
+    'матч', 'театр', 'премьера', 'завод', 'мост', 'школа', 'парк',
+    'концерт', 'выставка', 'дорога', 'ремонт', 'рынок', 'цены',
+)
+DETAIL_PATHS_LIMIT = 1000
+
+
+def make_text(rng, words_count):
+    return ' '.join(rng.choice(WORDS) for _ in range(words_count))
+
+
+def create_users(count):
+    """Пользователи без пароля: сессии для них создаются напрямую."""
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    User = get_user_model()
+    password = make_password(None)
+    User.objects.bulk_create(
+        User(username=f'user{index}', password=password)
+        for index in range(count)
+    )
+    return list(User.objects.order_by('id'))
+
+
+def create_sessions(users):
+    """Cookie вошедших пользователей, как после логина."""
+    from django.conf import settings
+    from django.test import Client
+
+    sessions = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        name = settings.SESSION_COOKIE_NAME
+        sessions.append({name: client.cookies[name].value})
+    return sessions
+
+
+def seed_news(options, rng):
+    from django.core.management import call_command
+    from django.urls import reverse
+    from django.utils import timezone
+
+    from news.models import Comment, News
+
+    users = create_users(options.users)
+    today = timezone.now().date()
+    News.objects.bulk_create(
+        (
+            News(
+                title=make_text(rng, 4)[:50],
+                text=make_text(rng, 60),
+                date=today - timedelta(days=index),
+            )
+            for index in range(options.news)
+        ),
+        batch_size=1000,
+    )
+    news_ids = list(News.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                news_id=news_id,
+                author=rng.choice(users),
+                text=make_text(rng, 15),
+            )
+            for news_id in news_ids
+            for _ in range(options.comments)
+        ),
+        batch_size=1000,
+    )
+    # bulk_create не шлёт сигналы, счётчики пересчитываем отдельно.
+    call_command('recount_comments', stdout=io.StringIO())
+    sample = rng.sample(news_ids, min(len(news_ids), DETAIL_PATHS_LIMIT))
+    return {
+        'sessions': create_sessions(users),
+        'paths': {
+            'home': reverse('news:home'),
+            'detail': [
+                reverse('news:detail', args=(news_id,))
+                for news_id in sample
+            ],
+        },
+    }
+
+
+def seed_note(options, rng):
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    users = create_users(options.users)
+    Note.objects.bulk_create(
+        (
+            Note(
+                title=make_text(rng, 4),
+                text=make_text(rng, 60),
+                slug=f'seed-{user.id}-{index}',
+                author=user,
+            )
+            for user in users
+            for index in range(options.notes)
+        ),
+        batch_size=1000,
+    )
+    return {
+        'sessions': create_sessions(users),
+        'paths': {
+            'list': reverse('notes:list'),
+            'add': reverse('notes:add'),
+        },
+    }
+
+
+SEEDERS = {'news': seed_news, 'note': seed_note}
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('project', choices=SEEDERS)
+    parser.add_argument('--manifest', required=True)
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=20)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--notes', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_args(args)
+    os.environ.setdefault(
+        'DJANGO_SETTINGS_MODULE', f'benchmarks.{options.project}_settings'
+    )
+    django.setup()
+    manifest = SEEDERS[options.project](options, random.Random(options.seed))
+    with open(options.manifest, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+
+
+if __name__ == '__main__':
+    main()
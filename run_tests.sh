@@ -15,43 +15,60 @@ print_message () {
 }
 
 
-if python -m flake8 --config=setup.cfg 1>&2;
-then
-    print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
-    echo $LF 1>&2
-    if python structure_test.py
-    then
-        cd ya_news
-        export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
-        if pytest --tb=line 1>&2;
-        then
-            cd ../ya_note
-            unset DJANGO_SETTINGS_MODULE
-            export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanote.settings"}"
-            if pytest --tb=line 1>&2;
-            then
-                exit 0
-            else
-                status=$?
-                print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
-                echo \`\`\` 1>&2
-                exit $status
-            fi
-        else
-            status=$?
-            print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
-            echo \`\`\` 1>&2
-            exit $status
-        fi
-    else
-        status=$?
-        print_message " Убедитесь, что написанные вами тесты скопированы в указанные в ТЗ директории " "=" 1
-        echo \`\`\` 1>&2
-        exit $status
-    fi
-else
-    status=$?
+# Все проверки запускаются одновременно, а их результаты выводятся в прежнем
+# порядке. Внутри проекта тесты раскладываются по процессам pytest-xdist
+# (см. pytest.ini), у каждого процесса своя тестовая база в памяти.
+logs=$(mktemp -d)
+trap 'rm -rf "$logs"' EXIT
+
+python -m flake8 --config=setup.cfg >"$logs/flake8" 2>&1 &
+flake8_pid=$!
+python structure_test.py >"$logs/structure" 2>&1 &
+structure_pid=$!
+(
+    cd ya_news
+    export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
+    pytest --tb=line
+) >"$logs/ya_news" 2>&1 &
+ya_news_pid=$!
+(
+    cd ya_note
+    export DJANGO_SETTINGS_MODULE="yanote.settings"
+    pytest --tb=line
+) >"$logs/ya_note" 2>&1 &
+ya_note_pid=$!
+
+wait $flake8_pid; flake8_status=$?
+wait $structure_pid; structure_status=$?
+wait $ya_news_pid; ya_news_status=$?
+wait $ya_note_pid; ya_note_status=$?
+
+cat "$logs/flake8" 1>&2
+if [[ $flake8_status -ne 0 ]]; then
     print_message " flake8 обнаружил отклонения от стандартов, приведите код в соответствие с PEP8 " "=" 1
     echo \`\`\` 1>&2
-    exit $status
+    exit $flake8_status
+fi
+print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
+echo $LF 1>&2
+
+cat "$logs/structure"
+if [[ $structure_status -ne 0 ]]; then
+    print_message " Убедитесь, что написанные вами тесты скопированы в указанные в ТЗ директории " "=" 1
+    echo \`\`\` 1>&2
+    exit $structure_status
+fi
+
+cat "$logs/ya_news" 1>&2
+if [[ $ya_news_status -ne 0 ]]; then
+    print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
+    echo \`\`\` 1>&2
+    exit $ya_news_status
+fi
+
+cat "$logs/ya_note" 1>&2
+if [[ $ya_note_status -ne 0 ]]; then
+    print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+    echo \`\`\` 1>&2
+    exit $ya_note_status
 fi
@@ -3,13 +3,36 @@ from datetime import datetime, timedelta
 
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 
+from news.cache import news_cache
+from news.comment_queue import CommentWriter, comment_writer
 from news.forms import BAD_WORDS
+from news.moderation import bad_words
 from news.models import Comment, News
 
 
+@pytest.fixture(autouse=True)
+def strict_query_budget(settings):
+    settings.QUERY_BUDGET_ENABLED = True
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    news_cache.clear_local()
+    bad_words.invalidate()
+
+
+@pytest.fixture
+def warm_bad_words(db):
+    """Автомат запрещённых слов уже собран, как в работающем процессе."""
+    bad_words.get_matcher()
+
+
 @pytest.fixture
 def news():
     return News.objects.create(title='Title', text='Text')
@@ -93,3 +116,17 @@ def updated_news_form_data():
 @pytest.fixture
 def bad_words_data():
     return {'text': f'Some text, {random.choice(BAD_WORDS)}, and more text'}
+
+
+@pytest.fixture
+def write_behind(settings, monkeypatch):
+    """
+    Отложенная запись комментариев без фонового потока.
+
+    Тест сам записывает очередь через write_next_batch.
+    """
+    settings.COMMENT_WRITE_BEHIND = True
+    monkeypatch.setattr(comment_writer, 'start', lambda: None)
+    yield comment_writer
+    monkeypatch.setattr(comment_writer, 'queue', CommentWriter().queue)
+    comment_writer.pending.clear()
@@ -1,15 +1,73 @@
+from django.conf import settings
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
 
-from .models import Comment, News
+from yanews.paginator import EstimatedCountPaginator
 
-
-class CommentInline(admin.StackedInline):
-    model = Comment
-    extra = 0
+from .models import BadWord, Comment, CommentVerdict, News
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
-    inlines = [
-        CommentInline,
-    ]
+    """
+    Новости без инлайна комментариев.
+
+    На странице новости показываются только последние комментарии,
+    все они — постранично в списке комментариев с фильтром по новости.
+    """
+    list_display = ('title', 'date', 'comment_count')
+    readonly_fields = ('latest_comments',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(description='Последние комментарии')
+    def latest_comments(self, news):
+        if news.pk is None:
+            return '—'
+        comments = news.comment_set.select_related('author').order_by(
+            '-created', '-id'
+        )[:settings.ADMIN_LATEST_COMMENTS_COUNT]
+        url = '{}?news__id__exact={}'.format(
+            reverse('admin:news_comment_changelist'), news.pk
+        )
+        return format_html(
+            '<ul>{}</ul><a href="{}">Все комментарии ({})</a>',
+            format_html_join(
+                '', '<li>{}: {}</li>',
+                ((comment.author, comment) for comment in comments),
+            ),
+            url,
+            news.comment_count,
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """Комментарии только просматриваются и удаляются, но не создаются."""
+    list_display = ('__str__', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    ordering = ('created', 'id')
+    readonly_fields = ('news', 'author', 'created')
+    search_fields = ('=author__username',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(CommentVerdict)
+class CommentVerdictAdmin(admin.ModelAdmin):
+    list_display = ('comment', 'flagged', 'rule', 'reason', 'checked')
+    list_filter = ('flagged',)
+    list_select_related = ('comment',)
+    readonly_fields = ('comment', 'flagged', 'rule', 'reason', 'checked')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(BadWord)
@@ -0,0 +1,190 @@
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.text import Truncator
+
+from yanews.object_cache import ObjectCache
+
+from .models import News
+
+NEWS_VERSION_KEY = 'news:version'
+HOME_PAGE_KEY = 'news:home:page:{version}'
+HOME_WINDOW_KEY = 'news:home:window'
+HOME_WINDOW_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+HOME_WINDOW_TEXT_WORDS = 15
+
+news_cache = ObjectCache(News)
+
+
+def after_commit(func):
+    """
+    Откладывает вызов до фиксации текущей транзакции.
+
+    Кэш общий для запросов, поэтому незафиксированные строки в него
+    не попадают, а при откате транзакции правка не выполняется.
+    """
+    @wraps(func)
+    def wrapper(*args):
+        transaction.on_commit(lambda: func(*args))
+    return wrapper
+
+
+def get_news_version():
+    """Версия данных новостей: меняется при любом их изменении."""
+    return cache.get_or_set(NEWS_VERSION_KEY, time.time_ns, None)
+
+
+@after_commit
+def bump_news_version():
+    """
+    Делает устаревшими все закэшированные страницы новостей.
+
+    Версия меняется после фиксации транзакции: иначе страница,
+    отрисованная до фиксации, легла бы в кэш под новой версией.
+    Старые записи не удаляются, а вытесняются кэшем по таймауту.
+    """
+    cache.set(NEWS_VERSION_KEY, time.time_ns(), None)
+
+
+def get_home_page(version):
+    return cache.get(HOME_PAGE_KEY.format(version=version))
+
+
+def set_home_page(version, content, timeout):
+    cache.set(HOME_PAGE_KEY.format(version=version), content, timeout)
+
+
+def home_window_key(item):
+    """Порядок новостей на главной: новые выше, при равной дате — по id."""
+    return (-item['date'].toordinal(), item['id'])
+
+
+def make_home_window_item(fields):
+    """Поля новости, нужные главной; текст сразу сокращается."""
+    item = {name: fields[name] for name in HOME_WINDOW_FIELDS}
+    item['text'] = Truncator(item['text']).words(HOME_WINDOW_TEXT_WORDS)
+    return item
+
+
+def build_home_window(size):
+    rows = News.objects.order_by('-date', 'id').values(
+        *HOME_WINDOW_FIELDS
+    )[:size]
+    return {
+        'size': size,
+        'items': [make_home_window_item(row) for row in rows],
+    }
+
+
+def get_home_window():
+    """
+    Новости главной страницы — первые NEWS_COUNT_ON_HOME_PAGE.
+
+    Окно хранится в кэше целиком и поправляется при изменении новостей
+    и их счётчиков комментариев (update_home_window и соседние
+    функции), так что обычно страница обходится одним чтением кэша.
+    Окно с другим размером, чем в настройке, строится заново.
+    """
+    size = settings.NEWS_COUNT_ON_HOME_PAGE
+    window = cache.get(HOME_WINDOW_KEY)
+    if window is None or window['size'] != size:
+        window = build_home_window(size)
+        set_home_window(window)
+    return [News(**item) for item in window['items']]
+
+
+def set_home_window(window):
+    cache.set(HOME_WINDOW_KEY, window, settings.NEWS_HOME_WINDOW_TIMEOUT)
+
+
+def drop_home_window():
+    cache.delete(HOME_WINDOW_KEY)
+
+
+@after_commit
+def invalidate_home_window():
+    drop_home_window()
+
+
+def get_cached_home_window():
+    """Окно из кэша, если оно есть и его размер совпадает с настройкой."""
+    window = cache.get(HOME_WINDOW_KEY)
+    if window is None or window['size'] != settings.NEWS_COUNT_ON_HOME_PAGE:
+        return None
+    return window
+
+
+def update_home_window(news_id):
+    """
+    Поправляет окно после сохранения новости.
+
+    Окно — точные первые size новостей, а все остальные идут после
+    его последней. Если новость ушла из полного окна, на её место
+    может встать любая из остальных: окно сбрасывается и при чтении
+    строится запросом.
+
+    Поля читаются сразу, а окно правится после фиксации транзакции:
+    так правки счётчика комментариев из той же транзакции ложатся
+    поверх прочитанного значения, а не учитываются дважды.
+    """
+    if get_cached_home_window() is None:
+        return
+    # У сохранённого объекта счётчик комментариев может быть устаревшим,
+    # а дата — ещё не приведённой к date.
+    fields = News.objects.filter(pk=news_id).values(
+        *HOME_WINDOW_FIELDS
+    ).first()
+    if fields is not None:
+        put_into_home_window(make_home_window_item(fields))
+
+
+@after_commit
+def put_into_home_window(item):
+    window = get_cached_home_window()
+    if window is None:
+        return
+    items = window['items']
+    others = [other for other in items if other['id'] != item['id']]
+    full = len(items) >= window['size']
+    belongs = not full or bool(items) and (
+        home_window_key(item) < home_window_key(items[-1])
+    )
+    if not belongs and len(others) < len(items):
+        drop_home_window()
+        return
+    if belongs:
+        window['items'] = sorted(others + [item], key=home_window_key)[
+            :window['size']
+        ]
+        set_home_window(window)
+
+
+@after_commit
+def remove_from_home_window(news_id):
+    """Убирает удалённую новость; полное окно дозаполнится при чтении."""
+    window = get_cached_home_window()
+    if window is None:
+        return
+    items = [item for item in window['items'] if item['id'] != news_id]
+    if len(items) == len(window['items']):
+        return
+    if len(window['items']) >= window['size']:
+        drop_home_window()
+        return
+    window['items'] = items
+    set_home_window(window)
+
+
+@after_commit
+def change_home_window_comment_count(news_id, delta):
+    window = get_cached_home_window()
+    if window is None:
+        return
+    for item in window['items']:
+        if item['id'] == news_id:
+            item['comment_count'] += delta
+            set_home_window(window)
+            return
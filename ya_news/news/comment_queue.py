@@ -0,0 +1,162 @@
+import atexit
+import itertools
+import logging
+import queue
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from .cache import bump_news_version, news_cache
+from .models import Comment, News
+from .signals import change_comment_count
+
+logger = logging.getLogger(__name__)
+
+
+class CommentWriter:
+    """
+    Отложенная запись комментариев (COMMENT_WRITE_BEHIND).
+
+    Представление проверяет форму и кладёт комментарий в очередь, а
+    фоновый поток пишет их в базу пачками до COMMENT_QUEUE_BATCH_SIZE
+    штук в одной транзакции. Очередь одна и поток один, поэтому
+    комментарии попадают в базу в порядке отправки.
+
+    Пока комментарий не записан, автор видит его на странице новости,
+    если запрос попал в тот же процесс. Очередь живёт в памяти
+    процесса: при завершении процесса поток ждёт записи не дольше
+    COMMENT_QUEUE_EXIT_TIMEOUT секунд, а при аварийном завершении
+    незаписанные комментарии теряются.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.pending = {}
+        self.numbers = itertools.count(1)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.exit_hook_registered = False
+
+    def submit(self, comment):
+        """Ставит проверенный, но не сохранённый комментарий в очередь."""
+        with self.lock:
+            comment.queue_number = next(self.numbers)
+            self.pending.setdefault(
+                (comment.news_id, comment.author_id), []
+            ).append(comment)
+            if self.thread is None:
+                self.start()
+        self.queue.put(comment)
+
+    def get_pending(self, news_id, author_id):
+        """Незаписанные комментарии автора к новости в порядке отправки."""
+        with self.lock:
+            return list(self.pending.get((news_id, author_id), ()))
+
+    def flush(self, timeout=None):
+        """
+        Ждёт, пока все комментарии из очереди будут записаны.
+
+        Возвращает False, если за timeout секунд очередь не опустела.
+        """
+        with self.queue.all_tasks_done:
+            return self.queue.all_tasks_done.wait_for(
+                lambda: not self.queue.unfinished_tasks, timeout
+            )
+
+    def flush_at_exit(self):
+        if not self.flush(settings.COMMENT_QUEUE_EXIT_TIMEOUT):
+            logger.error(
+                'Процесс завершается, не записано комментариев: %s',
+                self.queue.unfinished_tasks,
+            )
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.run, name='news-comments', daemon=True
+        )
+        self.thread.start()
+        if not self.exit_hook_registered:
+            atexit.register(self.flush_at_exit)
+            self.exit_hook_registered = True
+
+    def run(self):
+        while True:
+            try:
+                self.write_next_batch()
+            except Exception:
+                logger.exception('Сбой записи пачки комментариев')
+
+    def write_next_batch(self):
+        """Дожидается комментариев в очереди и записывает их пачкой."""
+        batch = [self.queue.get()]
+        while len(batch) < settings.COMMENT_QUEUE_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            close_old_connections()
+            self.write(batch)
+        finally:
+            self.forget(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    def write(self, batch):
+        """
+        Пишет пачку одним INSERT и обновляет счётчики комментариев.
+
+        Если пачка не записалась, комментарии пишутся по одному,
+        и теряются только сбойные.
+        """
+        try:
+            write_comments(batch)
+        except DatabaseError:
+            for comment in batch:
+                try:
+                    write_comments([comment])
+                except DatabaseError:
+                    logger.exception(
+                        'Не удалось записать комментарий к новости %s',
+                        comment.news_id,
+                    )
+
+    def forget(self, batch):
+        with self.lock:
+            for comment in batch:
+                key = (comment.news_id, comment.author_id)
+                comments = self.pending.get(key, [])
+                if comment in comments:
+                    comments.remove(comment)
+                if not comments:
+                    self.pending.pop(key, None)
+
+
+def write_comments(comments):
+    """
+    Сохраняет комментарии одной транзакцией.
+
+    Комментарии к новостям, удалённым после отправки, пропускаются.
+    bulk_create не отправляет post_save, поэтому счётчики и кэш
+    новостей обновляются здесь — по одному разу на новость.
+    """
+    with transaction.atomic():
+        news_ids = set(News.objects.filter(
+            pk__in={comment.news_id for comment in comments}
+        ).values_list('pk', flat=True))
+        comments = [
+            comment for comment in comments if comment.news_id in news_ids
+        ]
+        news_counts = Counter(comment.news_id for comment in comments)
+        Comment.objects.bulk_create(comments)
+        for news_id, count in news_counts.items():
+            change_comment_count(news_id, count)
+    bump_news_version()
+    for news_id in news_counts:
+        news_cache.invalidate(news_id)
+
+
+comment_writer = CommentWriter()
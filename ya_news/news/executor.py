@@ -0,0 +1,51 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from yanews.middleware import count_queries
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Пул потоков для работы асинхронных представлений с базой.
+
+    Размер пула задаётся настройкой NEWS_ASYNC_DB_THREADS. У каждого
+    потока своё соединение, которое живёт CONN_MAX_AGE секунд.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.NEWS_ASYNC_DB_THREADS,
+                thread_name_prefix='news-db',
+            )
+    return _executor
+
+
+def run_db_job(func, *args, **kwargs):
+    close_old_connections()
+    with count_queries():
+        return func(*args, **kwargs)
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """
+    Выполняет синхронную работу с базой в пуле потоков.
+
+    Цикл событий в это время обслуживает другие запросы, а медленные
+    клиенты не занимают потоки пула.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(),
+        partial(context.run, run_db_job, func, *args, **kwargs),
+    )
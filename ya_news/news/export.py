@@ -0,0 +1,38 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+COMMENT_EXPORT_FIELDS = ('id', 'author__username', 'created', 'text')
+
+
+class Echo:
+    """Файл, который возвращает записанную строку вместо сохранения."""
+
+    def write(self, value):
+        return value
+
+
+def export_json(rows, fields):
+    """JSON-массив записей, по записи за шаг."""
+    separator = '[\n'
+    for row in rows:
+        yield separator + json.dumps(
+            dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False
+        )
+        separator = ',\n'
+    yield '[]\n' if separator == '[\n' else '\n]\n'
+
+
+def export_csv(rows, fields):
+    """CSV с заголовком, по строке за шаг."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'json': (export_json, 'application/json'),
+    'csv': (export_csv, 'text/csv'),
+}
@@ -0,0 +1,73 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.moderation import WordMatcher
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def naive_find(words, text):
+    """Прежняя проверка: поиск подстроки для каждого слова по очереди."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def random_word(rng, min_length=5, max_length=12):
+    return ''.join(
+        rng.choice(ALPHABET)
+        for _ in range(rng.randint(min_length, max_length))
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает проверку комментария на запрещённые слова циклом '
+        'и автоматом Ахо — Корасик.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 1000, 50000],
+            help='Размеры списков слов.',
+        )
+        parser.add_argument(
+            '--text-length', type=int, default=1000,
+            help='Длина проверяемого текста в символах.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Число проверок для каждого замера.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        repeat = options['repeat']
+        text = ' '.join(
+            random_word(rng, 2, 8)
+            for _ in range(options['text_length'] // 5)
+        )[:options['text_length']]
+        self.stdout.write(
+            f'{"слов":>8} {"сборка, мс":>12} {"цикл, мс":>12} '
+            f'{"автомат, мс":>12}'
+        )
+        for size in options['sizes']:
+            words = [random_word(rng) for _ in range(size)]
+            build = timeit.timeit(lambda: WordMatcher(words), number=1)
+            matcher = WordMatcher(words)
+            naive = timeit.timeit(
+                lambda: naive_find(words, text), number=repeat
+            )
+            automaton = timeit.timeit(
+                lambda: matcher.find(text), number=repeat
+            )
+            self.stdout.write(
+                f'{size:>8} {build * 1000:>12.2f} '
+                f'{naive / repeat * 1000:>12.3f} '
+                f'{automaton / repeat * 1000:>12.3f}'
+            )
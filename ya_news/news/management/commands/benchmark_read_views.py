@@ -0,0 +1,87 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncRequestFactory, RequestFactory
+from django.urls import reverse
+
+from news.models import News
+from news.views import AsyncNewsDetailView, NewsDetailView
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность синхронной (WSGI) и '
+        'асинхронной (ASGI) страницы новости при медленных клиентах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help='Число одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Число рабочих потоков WSGI-сервера.',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Сколько секунд клиент занимает соединение после ответа.',
+        )
+
+    def handle(self, *args, **options):
+        news = News.objects.first()
+        if news is None:
+            raise CommandError('В базе нет новостей для замера.')
+        path = reverse('news:detail', args=(news.pk,))
+        results = (
+            ('WSGI', self.run_sync(path, news.pk, options)),
+            ('ASGI', self.run_async(path, news.pk, options)),
+        )
+        for name, elapsed in results:
+            self.stdout.write(
+                f'{name}: {options["requests"] / elapsed:.1f} запросов/с '
+                f'({elapsed:.2f} с)'
+            )
+
+    def run_sync(self, path, pk, options):
+        """Каждый клиент занимает рабочий поток на всё время запроса."""
+        view = NewsDetailView.as_view()
+        factory = RequestFactory()
+
+        def handle_request(_):
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            view(request, pk=pk).render()
+            time.sleep(options['client_delay'])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['workers']) as executor:
+            list(executor.map(handle_request, range(options['requests'])))
+        return time.perf_counter() - start
+
+    def run_async(self, path, pk, options):
+        """Медленный клиент ждёт в цикле событий, не занимая поток."""
+        view = AsyncNewsDetailView.as_view()
+        factory = AsyncRequestFactory()
+
+        async def handle_request(semaphore):
+            async with semaphore:
+                request = factory.get(path)
+                request.user = AnonymousUser()
+                await view(request, pk=pk)
+                await asyncio.sleep(options['client_delay'])
+
+        async def run():
+            semaphore = asyncio.Semaphore(options['concurrency'])
+            await asyncio.gather(*(
+                handle_request(semaphore)
+                for _ in range(options['requests'])
+            ))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        return time.perf_counter() - start
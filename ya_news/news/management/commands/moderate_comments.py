@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.models import Comment
+from news.moderation import build_checks
+from news.rescan import rescan_comments
+
+
+class Command(BaseCommand):
+    help = (
+        'Перепроверяет комментарии проверками из COMMENT_MODERATION_CHECKS '
+        'и записывает вердикты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.COMMENT_MODERATION_BATCH_SIZE,
+            help='Комментариев в одной пачке.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Процессов для проверок; 1 — без пула процессов.',
+        )
+        parser.add_argument(
+            '--only-new', action='store_true',
+            help='Проверять только комментарии без вердикта.',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Comment.objects.all()
+        if options['only_new']:
+            queryset = queryset.filter(verdict__isnull=True)
+        start = time.perf_counter()
+        stats = rescan_comments(
+            build_checks(),
+            queryset,
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Проверено комментариев: {stats["checked"]}, '
+            f'отклонено: {stats["flagged"]} '
+            f'за {elapsed:.2f} с '
+            f'({stats["checked"] / max(elapsed, 1e-9):.0f} в секунду)'
+        )
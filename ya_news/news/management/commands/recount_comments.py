@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.cache import (
+    bump_news_version, invalidate_home_window, news_cache
+)
+from news.models import Comment, News
+
+
+def comment_count_subquery():
+    """Подзапрос с фактическим числом комментариев новости."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(news=OuterRef('pk'))
+            .order_by()
+            .values('news')
+            .annotate(count=Count('pk'))
+            .values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у всех новостей.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Кэш объектов сбрасывается только у новостей, где счётчик
+            # разошёлся с фактическим числом комментариев.
+            wrong_news = News.objects.exclude(
+                comment_count=comment_count_subquery()
+            )
+            wrong_ids = list(wrong_news.values_list('pk', flat=True))
+            updated = wrong_news.update(comment_count=comment_count_subquery())
+        bump_news_version()
+        invalidate_home_window()
+        for news_id in wrong_ids:
+            news_cache.invalidate(news_id)
+        self.stdout.write(f'Исправлено новостей: {updated}')
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from yanews.warmup import warmup_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает все шаблоны проекта: проверяет их перед выкладкой '
+        'и показывает, сколько времени займёт прогрев при запуске.'
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        names = warmup_templates()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Загружено шаблонов: {len(names)} за {elapsed * 1000:.1f} мс'
+        )
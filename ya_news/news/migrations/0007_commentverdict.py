@@ -0,0 +1,28 @@
+# Generated by Django 3.2.15 on 2026-10-18 21:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_title_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentVerdict',
+            fields=[
+                ('comment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='verdict', serialize=False, to='news.comment')),
+                ('flagged', models.BooleanField(default=False, verbose_name='Отклонён')),
+                ('rule', models.CharField(blank=True, max_length=50, verbose_name='Проверка')),
+                ('reason', models.CharField(blank=True, max_length=200, verbose_name='Причина')),
+                ('checked', models.DateTimeField(auto_now=True, verbose_name='Проверен')),
+            ],
+            options={
+                'verbose_name': 'Вердикт модерации',
+                'verbose_name_plural': 'Вердикты модерации',
+            },
+        ),
+    ]
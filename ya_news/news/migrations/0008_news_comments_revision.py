@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 21:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_commentverdict'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comments_revision',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Правок комментариев'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 21:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_news_comments_revision'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='commentverdict',
+            name='comment',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='verdict', serialize=False, to='news.comment'),
+        ),
+    ]
@@ -5,18 +5,63 @@ from django.db import models
 
 
 class News(models.Model):
+    # Счётчики меняются только UPDATE с F() в news.signals: обычный
+    # save() записал бы прочитанное раньше и уже устаревшее значение.
+    COUNTER_FIELDS = ('comment_count', 'comments_revision')
+
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+    )
+    comments_revision = models.PositiveIntegerField(
+        'Правок комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date',), name='news_date_idx'),
+            models.Index(fields=('title', 'date'), name='news_title_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, update_fields=None, **kwargs):
+        if not self._state.adding:
+            if update_fields is None:
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            update_fields = [
+                name for name in update_fields
+                if name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def delete(self):
+        """
+        Удаляет комментарии и одним UPDATE уменьшает счётчики новостей.
+
+        Обработчиков удаления у Comment нет, поэтому каскад от новости
+        удаляет её комментарии одним DELETE без загрузки в память.
+        """
+        from .signals import delete_comments
+
+        return delete_comments(self, super().delete)
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -30,8 +75,60 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def delete(self, using=None, keep_parents=False):
+        from .signals import delete_comments
+
+        comments = Comment.objects.using(using).filter(pk=self.pk)
+        deleted = delete_comments(
+            comments, super(CommentQuerySet, comments).delete, self.news_id
+        )
+        self.pk = None
+        return deleted
+
+
+class CommentVerdict(models.Model):
+    """Результат последней перепроверки комментария."""
+    # Вердикты удаляются вместе с комментариями в delete_comments и при
+    # удалении новости: с CASCADE каскад грузил бы все её комментарии.
+    comment = models.OneToOneField(
+        Comment,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        related_name='verdict',
+    )
+    flagged = models.BooleanField('Отклонён', default=False)
+    rule = models.CharField('Проверка', max_length=50, blank=True)
+    reason = models.CharField('Причина', max_length=200, blank=True)
+    checked = models.DateTimeField('Проверен', auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Вердикты модерации'
+        verbose_name = 'Вердикт модерации'
+
+    def __str__(self):
+        return self.reason or 'Одобрен'
+
+
+class BadWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+
+    class Meta:
+        verbose_name_plural = 'Запрещённые слова'
+        verbose_name = 'Запрещённое слово'
+
+    def __str__(self):
+        return self.word
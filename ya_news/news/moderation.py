@@ -0,0 +1,240 @@
+import os
+import re
+from collections import deque
+
+from django.conf import settings
+
+BAD_WORDS = (
+    'редиска',
+    'негодяй',
+    # Дополните список на своё усмотрение.
+)
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска любого из слов в тексте.
+
+    Строится один раз по списку слов, после чего текст проверяется
+    за один проход независимо от длины списка.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._match = [None]
+        for word in words:
+            self._add_word(word.lower())
+        self._build_fail_links()
+
+    def _add_word(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._match.append(None)
+            state = next_state
+        if self._match[state] is None:
+            self._match[state] = word
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._match[next_state] is None:
+                    self._match[next_state] = (
+                        self._match[self._fail[next_state]]
+                    )
+
+    def find(self, text):
+        """Возвращает первое найденное в тексте слово или None."""
+        goto, fail, match = self._goto, self._fail, self._match
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if match[state] is not None:
+                return match[state]
+        return None
+
+
+def read_words_file(path):
+    """Слова из файла: по одному в строке, пустые строки пропускаются."""
+    with open(path, encoding='utf-8') as words_file:
+        return [line.strip() for line in words_file if line.strip()]
+
+
+def load_bad_words():
+    """Собирает запрещённые слова из BAD_WORDS, файла и базы данных."""
+    from .models import BadWord
+
+    words = set(BAD_WORDS)
+    path = getattr(settings, 'BAD_WORDS_FILE', None)
+    if path and os.path.exists(path):
+        words.update(read_words_file(path))
+    words.update(BadWord.objects.values_list('word', flat=True))
+    return words
+
+
+class BadWords:
+    """
+    Запрещённые слова, собранные в автомат.
+
+    Автомат строится при первой проверке и перестраивается, когда
+    меняется файл BAD_WORDS_FILE или записи BadWord в этом процессе
+    (через сигналы). Другие процессы увидят новые записи BadWord
+    после reload() или перезапуска.
+    """
+
+    def __init__(self):
+        self._matcher = None
+        self._file_mtime = None
+
+    def find(self, text):
+        return self.get_matcher().find(text)
+
+    def get_matcher(self):
+        if self._matcher is None or self._file_changed():
+            self.reload()
+        return self._matcher
+
+    def reload(self):
+        self._file_mtime = self._get_file_mtime()
+        self._matcher = WordMatcher(load_bad_words())
+
+    def invalidate(self):
+        self._matcher = None
+
+    def _file_changed(self):
+        return self._get_file_mtime() != self._file_mtime
+
+    @staticmethod
+    def _get_file_mtime():
+        path = getattr(settings, 'BAD_WORDS_FILE', None)
+        if not path:
+            return None
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+bad_words = BadWords()
+
+
+MODERATION_CHECKS = {}
+LINK_RE = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+
+def register_check(check_class):
+    """
+    Регистрирует проверку для перепроверки комментариев.
+
+    Проверка включается, когда её имя `name` указано в настройке
+    COMMENT_MODERATION_CHECKS; значение настройки — аргументы
+    конструктора.
+    """
+    MODERATION_CHECKS[check_class.name] = check_class
+    return check_class
+
+
+def build_checks(config=None):
+    """Проверки из COMMENT_MODERATION_CHECKS в порядке настройки."""
+    if config is None:
+        config = settings.COMMENT_MODERATION_CHECKS
+    return [
+        MODERATION_CHECKS[name](**options) for name, options in config.items()
+    ]
+
+
+class Check:
+    """
+    Проверка текстов комментариев.
+
+    check возвращает причину отказа или None. Проверки передаются
+    в процессы пула, поэтому должны сериализоваться pickle.
+    """
+    name = None
+
+    def check(self, text):
+        raise NotImplementedError
+
+    def check_batch(self, texts):
+        """Причины отказа для пачки текстов."""
+        return [self.check(text) for text in texts]
+
+
+@register_check
+class BadWordsCheck(Check):
+    """Запрещённые слова; по умолчанию — те же, что у формы."""
+    name = 'bad_words'
+
+    def __init__(self, words=None):
+        self.matcher = WordMatcher(
+            load_bad_words() if words is None else words
+        )
+
+    def check(self, text):
+        word = self.matcher.find(text)
+        if word is None:
+            return None
+        return f'Запрещённое слово: {word}'
+
+
+@register_check
+class RegexCheck(Check):
+    """Регулярные выражения, собранные в одно."""
+    name = 'regex'
+
+    def __init__(self, patterns=()):
+        self.regex = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern in patterns),
+            re.IGNORECASE,
+        ) if patterns else None
+
+    def check(self, text):
+        match = self.regex and self.regex.search(text)
+        if not match:
+            return None
+        return f'Совпадение с шаблоном: {match.group()}'
+
+
+@register_check
+class LengthCheck(Check):
+    name = 'length'
+
+    def __init__(self, max_length=2000):
+        self.max_length = max_length
+
+    def check(self, text):
+        if len(text) <= self.max_length:
+            return None
+        return f'Длиннее {self.max_length} символов'
+
+
+@register_check
+class LinksCheck(Check):
+    """Слишком много ссылок — признак спама."""
+    name = 'links'
+
+    def __init__(self, max_links=3):
+        self.max_links = max_links
+
+    def check(self, text):
+        links = len(LINK_RE.findall(text))
+        if links <= self.max_links:
+            return None
+        return f'Ссылок: {links}'
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+CURSOR_SEPARATOR = '-'
+MAX_ID = 2 ** 63 - 1
+
+
+def encode_cursor(comment):
+    """Курсор на комментарий: время создания в микросекундах и id."""
+    timestamp = (comment.created - EPOCH) // MICROSECOND
+    return f'{timestamp}{CURSOR_SEPARATOR}{comment.pk}'
+
+
+def decode_cursor(cursor):
+    """
+    Разбирает курсор, созданный encode_cursor.
+
+    Для некорректного значения поднимает ValueError, в том числе для
+    времени за пределами datetime и id за пределами целых SQLite.
+    """
+    timestamp, pk = cursor.split(CURSOR_SEPARATOR)
+    pk = int(pk)
+    if not 0 < pk <= MAX_ID:
+        raise ValueError(f'id вне допустимого диапазона: {pk}')
+    try:
+        created = EPOCH + int(timestamp) * MICROSECOND
+    except OverflowError as error:
+        raise ValueError(f'время вне допустимого диапазона: {error}')
+    return created, pk
+
+
+def paginate_comments(queryset, cursor, page_size):
+    """
+    Возвращает страницу комментариев после курсора и курсор следующей.
+
+    Страница выбирается по паре (created, id) без OFFSET, поэтому
+    стоимость запроса не зависит от её номера.
+    """
+    queryset = queryset.order_by('created', 'id')
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, id__gt=pk)
+        )
+    comments = list(queryset[:page_size + 1])
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        return comments, encode_cursor(comments[-1])
+    return comments, None
@@ -0,0 +1,90 @@
+import asyncio
+from http import HTTPStatus
+from importlib import reload
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import clear_url_caches, resolve
+
+import news.urls
+import yanews.urls
+from news.views import AsyncNewsDetailView, AsyncNewsList
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+HOME_URL = '/'
+
+
+def reload_urls():
+    reload(news.urls)
+    reload(yanews.urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views(settings):
+    """Маршруты проекта с NEWS_ASYNC_VIEWS = True."""
+    settings.NEWS_ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.NEWS_ASYNC_VIEWS = False
+    reload_urls()
+
+
+@pytest.fixture
+def async_client():
+    return AsyncClient()
+
+
+def send_request(client, method, path, **extra):
+
+    async def send():
+        return await getattr(client, method)(path, **extra)
+
+    return async_to_sync(send)()
+
+
+def get(client, path, **extra):
+    return send_request(client, 'get', path, **extra)
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_views_are_routed():
+    for path, view_class in (
+        (HOME_URL, AsyncNewsList), ('/news/1/', AsyncNewsDetailView),
+    ):
+        view = resolve(path).func
+        assert view.view_class is view_class
+        assert asyncio.iscoroutinefunction(view)
+
+
+@pytest.mark.usefixtures('bulk_news')
+def test_async_home_page_matches_sync(client, async_client, request):
+    sync_response = client.get(HOME_URL)
+    cache.clear()
+    request.getfixturevalue('async_views')
+    response = get(async_client, HOME_URL)
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == sync_response.content
+
+
+@pytest.mark.usefixtures('bulk_comments', 'async_views')
+def test_async_detail_page(author, async_client, news, news_detail_url):
+    async_client.force_login(author)
+    response = get(async_client, news_detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.context['news'] == news
+    assert response.context['comments'] == list(news.comment_set.all())
+    assert 'form' in response.context
+    not_modified = get(
+        async_client, news_detail_url, **{'If-None-Match': response['ETag']}
+    )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_view_rejects_unknown_method(async_client):
+    response = send_request(async_client, 'put', HOME_URL)
+    assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
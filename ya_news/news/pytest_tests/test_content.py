@@ -1,17 +1,24 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
 from django.urls import reverse
 
 from news.forms import CommentForm
+from news.models import Comment, News
 
 HOME_URL = reverse('news:home')
+SEARCH_URL = reverse('news:search')
 
 
 @pytest.mark.django_db
 @pytest.mark.usefixtures('bulk_news')
 def test_news_count(client):
     response = client.get(HOME_URL)
-    news_count = response.context['object_list'].count()
+    news_count = len(response.context['object_list'])
     assert news_count == settings.NEWS_COUNT_ON_HOME_PAGE
 
 
@@ -24,6 +31,28 @@ def test_news_order(client):
     assert all_dates == sorted_dates
 
 
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_comments')
+def test_news_comment_count(client, news):
+    response = client.get(HOME_URL)
+    news_on_page, = response.context['object_list']
+    assert news_on_page.comment_count == news.comment_set.count()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_page_queries_do_not_depend_on_comments(
+    client, author, django_assert_num_queries
+):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Text {index}')
+        for news in News.objects.all()
+        for index in range(5)
+    )
+    with django_assert_num_queries(1):
+        client.get(HOME_URL)
+
+
 @pytest.mark.django_db
 @pytest.mark.usefixtures('bulk_comments')
 def test_comments_order(client, news, news_detail_url):
@@ -45,3 +74,107 @@ def test_authorized_client_has_form(admin_client, news, news_detail_url):
     response = admin_client.get(news_detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_comments')
+def test_comments_pagination(client, news, news_detail_url, settings):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    response = client.get(news_detail_url)
+    first_page = response.context['comments']
+    next_cursor = response.context['next_cursor']
+    assert len(first_page) == 1
+    assert next_cursor is not None
+    response = client.get(news_detail_url, {'after': next_cursor})
+    second_page = response.context['comments']
+    assert response.context['next_cursor'] is None
+    assert first_page + second_page == list(news.comment_set.all())
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_comments')
+def test_comments_page_queries_do_not_depend_on_cursor(
+    client, news_detail_url, settings, django_assert_num_queries
+):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    response = client.get(news_detail_url)
+    with django_assert_num_queries(2):
+        client.get(news_detail_url)
+    with django_assert_num_queries(2):
+        client.get(
+            news_detail_url, {'after': response.context['next_cursor']}
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'cursor',
+    (
+        'bad', '1-2-3', 'a-1', '99999999999999999999-1',
+        f'1-{2 ** 63}', '1-0',
+    ),
+)
+def test_bad_comments_cursor(client, news, news_detail_url, cursor):
+    response = client.get(news_detail_url, {'after': cursor})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_highlights(client):
+    News.objects.create(title='Погода', text='Завтра будет дождь, <b>зонт</b>')
+    best = News.objects.create(title='Дождь', text='Дождь, дождь и дождь')
+    response = client.get(SEARCH_URL, {'q': 'ДОЖДЬ'})
+    results = response.context['results']
+    assert [news.pk for news in results][0] == best.pk
+    assert len(results) == 2
+    content = response.content.decode()
+    assert '<mark>Дождь</mark>' in content
+    assert '<b>зонт</b>' not in content
+
+
+@pytest.mark.django_db
+def test_search_follows_news_changes(client, news):
+    news.title = 'Уникальный заголовок'
+    news.save()
+    response = client.get(SEARCH_URL, {'q': 'уникальный'})
+    assert [found.pk for found in response.context['results']] == [news.pk]
+    news.delete()
+    response = client.get(SEARCH_URL, {'q': 'уникальный'})
+    assert response.context['results'] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ('', '"', 'AND OR NOT', 'title:*'))
+def test_search_accepts_any_query(client, news, query):
+    response = client.get(SEARCH_URL, {'q': query})
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'export_format, parse',
+    (
+        ('json', json.loads),
+        ('csv', lambda data: list(csv.DictReader(io.StringIO(data)))),
+    )
+)
+def test_comments_export(client, bulk_comments, export_format, parse):
+    url = reverse('news:comments_export', args=(bulk_comments.pk,))
+    response = client.get(url, {'format': export_format})
+    assert response.streaming
+    rows = parse(b''.join(response.streaming_content).decode())
+    comments = bulk_comments.comment_set.order_by('created')
+    assert [row['text'] for row in rows] == [
+        comment.text for comment in comments
+    ]
+    assert {row['author__username'] for row in rows} == {'Author'}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'pk_shift, export_format', ((1, 'json'), (0, 'xml'))
+)
+def test_comments_export_not_found(client, news, pk_shift, export_format):
+    url = reverse('news:comments_export', args=(news.pk + pk_shift,))
+    response = client.get(url, {'format': export_format})
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction
+
+from news.models import Comment, CommentVerdict, News
+
+WRITERS_COUNT = 16
+COMMENTS_PER_WRITER = 25
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'pragma, expected_value',
+    (('synchronous', 1), ('busy_timeout', 5000), ('temp_store', 2)),
+)
+def test_connection_pragmas(pragma, expected_value):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {pragma}')
+        assert cursor.fetchone()[0] == expected_value
+
+
+@contextmanager
+def file_database(path):
+    """
+    Подключения default, открытые в других потоках, ведут в файл path.
+
+    Подключение самого теста к тестовой базе остаётся прежним.
+    """
+    database_settings = connections.settings['default']
+    connections.settings['default'] = {**database_settings, 'NAME': path}
+    try:
+        yield
+    finally:
+        connections.settings['default'] = database_settings
+
+
+def in_thread(func, *args):
+    """Вызывает func в отдельном потоке со своими подключениями к базе."""
+
+    def run():
+        try:
+            return func(*args)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(run).result()
+
+
+def create_news():
+    """Таблицы пользователей, новостей и комментариев с одной новостью."""
+    with connections['default'].schema_editor() as editor:
+        for model in (User, News, Comment, CommentVerdict):
+            editor.create_model(model)
+    author = User.objects.create(username='Author')
+    news = News.objects.create(title='Title', text='Text')
+    return author, news
+
+
+def post_comments(author, news, writer):
+    """Пишет комментарии так же, как представление: create и сигналы."""
+    try:
+        for index in range(COMMENTS_PER_WRITER):
+            with transaction.atomic():
+                Comment.objects.create(
+                    news=news, author=author, text=f'Comment {writer}-{index}'
+                )
+    finally:
+        connections.close_all()
+
+
+def read_counts(news):
+    with connections['default'].cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode, = cursor.fetchone()
+    return (
+        journal_mode,
+        Comment.objects.filter(news=news).count(),
+        News.objects.get(pk=news.pk).comment_count,
+    )
+
+
+def test_concurrent_comment_writers(tmp_path, django_db_blocker):
+    """
+    Параллельные писатели в файловую базу не получают «database is locked».
+
+    Тестовая база в памяти не подходит: в режиме общего кэша SQLite
+    блокирует таблицы целиком и не ждёт busy_timeout. Поэтому писатели
+    работают в своих потоках с подключениями к файловой базе.
+    """
+    with django_db_blocker.unblock(), file_database(tmp_path / 'db.sqlite3'):
+        author, news = in_thread(create_news)
+        with ThreadPoolExecutor(WRITERS_COUNT) as executor:
+            list(executor.map(
+                lambda writer: post_comments(author, news, writer),
+                range(WRITERS_COUNT),
+            ))
+        journal_mode, comments_count, comment_count = in_thread(
+            read_counts, news
+        )
+    assert journal_mode == 'wal'
+    assert comments_count == WRITERS_COUNT * COMMENTS_PER_WRITER
+    assert comment_count == comments_count
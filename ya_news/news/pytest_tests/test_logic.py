@@ -1,10 +1,26 @@
+import json
+import os
+from datetime import date
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from pytest_django.asserts import assertFormError, assertRedirects
 
-from news.forms import WARNING
-from news.models import Comment
+from news.cache import get_news_version, news_cache
+from news.comment_queue import CommentWriter
+from news.forms import BAD_WORDS, WARNING, CommentForm
+from news.models import BadWord, Comment, CommentVerdict, News
+from news.moderation import (
+    LengthCheck, LinksCheck, RegexCheck, WordMatcher, build_checks
+)
+from news.rescan import rescan_comments
+from news.search import search_news
 
 
 @pytest.mark.django_db
@@ -56,6 +72,7 @@ def test_user_cant_delete_comment_of_another_user(
     assert Comment.objects.count() == initial_comments_count
 
 
+@pytest.mark.usefixtures('warm_bad_words')
 def test_author_can_edit_comment(
     author, author_client, comment_edit_url, updated_news_form_data,
     news_comments_url, news, comment
@@ -80,3 +97,371 @@ def test_user_cant_edit_comment_of_another_user(
     assert comment.text == news_form_data['text']
     assert comment.author == author
     assert comment.news == news
+
+
+def test_comment_count_follows_create_and_delete(
+    author_client, news, news_detail_url, news_form_data
+):
+    author_client.post(news_detail_url, data=news_form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    Comment.objects.get().delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_comment_count_follows_comment_delete_view(
+    author_client, news, comment, comment_delete_url
+):
+    author_client.delete(comment_delete_url)
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_news_save_keeps_comment_count(author, news):
+    stale_news = News.objects.get(pk=news.pk)
+    Comment.objects.create(news=news, author=author, text='Text')
+    Comment.objects.create(news=news, author=author, text='Text')
+    stale_news.title = 'Updated title'
+    stale_news.save()
+    news.refresh_from_db()
+    assert news.title == 'Updated title'
+    assert news.comment_count == 2
+
+
+@pytest.mark.django_db
+def test_comment_deleted_twice_decrements_once(author, news, comment):
+    Comment.objects.create(news=news, author=author, text='Text')
+    stale_comment = Comment.objects.get(pk=comment.pk)
+    comment.delete()
+    stale_comment.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_cascade_delete(author, news, comment):
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def count_delete_queries(instance):
+    with CaptureQueriesContext(connection) as context:
+        instance.delete()
+    return [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('comments_count', (1, 30))
+def test_cascade_delete_queries_independent_of_comments(
+    author, news, comments_count
+):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Text {index}')
+        for index in range(comments_count)
+    )
+    queries = count_delete_queries(news)
+    assert len(queries) == 3
+    assert not any(sql.startswith('UPDATE') for sql in queries)
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_user_delete_updates_counts_in_one_query(author, news):
+    other_news = News.objects.create(title='Other', text='Text')
+    for index in range(3):
+        Comment.objects.create(news=news, author=author, text='Text')
+    Comment.objects.create(news=other_news, author=author, text='Text')
+    queries = count_delete_queries(author)
+    updates = [sql for sql in queries if sql.startswith('UPDATE "news_news"')]
+    assert len(updates) == 1
+    assert list(
+        News.objects.order_by('id').values_list('comment_count', flat=True)
+    ) == [0, 0]
+
+
+@pytest.mark.django_db
+def test_queryset_delete_updates_comment_counts(author, news, comment):
+    Comment.objects.create(news=news, author=author, text='Text')
+    Comment.objects.filter(pk=comment.pk).delete()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(
+    news, comment, django_capture_on_commit_callbacks
+):
+    News.objects.update(comment_count=100)
+    news_cache.get('pk', news.pk)
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news_cache.get('pk', news.pk).comment_count == 1
+
+
+@pytest.mark.parametrize(
+    'text, expected_word',
+    (
+        ('ushers', 'she'),
+        ('HIS HERS', 'his'),
+        ('xhers', 'he'),
+        ('nothing at all', None),
+    ),
+)
+def test_word_matcher(text, expected_word):
+    matcher = WordMatcher(('he', 'she', 'his', 'hers'))
+    assert matcher.find(text) == expected_word
+
+
+@pytest.mark.django_db
+def test_bad_words_from_database():
+    form_data = {'text': 'Ах ты, злодей!'}
+    assert CommentForm(data=form_data).is_valid()
+    BadWord.objects.create(word='злодей')
+    assert not CommentForm(data=form_data).is_valid()
+
+
+@pytest.mark.django_db
+def test_bad_words_file_reloaded(tmp_path, settings):
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('злодей\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    form_data = {'text': 'Ах ты, разбойник!'}
+    assert CommentForm(data=form_data).is_valid()
+    words_file.write_text('злодей\nразбойник\n', encoding='utf-8')
+    mtime = words_file.stat().st_mtime_ns + 10 ** 9
+    os.utime(words_file, ns=(mtime, mtime))
+    assert not CommentForm(data=form_data).is_valid()
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index_command(news):
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert [found.pk for found in search_news(news.title, 10)] == [news.pk]
+
+
+@pytest.mark.django_db
+def test_import_news_command(
+    tmp_path, monkeypatch, django_capture_on_commit_callbacks
+):
+    News.objects.create(title='Old', text='Text', date=date(2022, 1, 1))
+    rows = (
+        {'title': 'Old', 'text': 'Text', 'date': '2022-01-01'},
+        {'title': 'First', 'text': 'Text', 'date': '2022-01-02'},
+        {'title': 'First', 'text': 'Again', 'date': '2022-01-02'},
+        {'title': 'Second', 'text': 'Text'},
+        {'title': '', 'text': 'Text', 'date': '2022-01-03'},
+        {'title': 'Third', 'text': 'Text', 'date': 20220104},
+    )
+    path = tmp_path / 'news.jsonl'
+    path.write_text(
+        '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n'
+    )
+    version = get_news_version()
+    stderr = StringIO()
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command(
+            'import_news', str(path), batch_size=2,
+            stdout=StringIO(), stderr=stderr,
+        )
+    assert sorted(News.objects.values_list('title', 'text')) == [
+        ('First', 'Text'), ('Old', 'Text'), ('Second', 'Text')
+    ]
+    assert 'Запись 5' in stderr.getvalue()
+    assert 'Запись 6' in stderr.getvalue()
+    assert 'Запись 7' in stderr.getvalue()
+    assert 'недопустимое значение 20220104' in stderr.getvalue()
+    assert get_news_version() != version
+    assert search_news('Second', 1)[0].title == 'Second'
+    monkeypatch.setattr(
+        'sys.stdin', StringIO('title,text,date\nThird,Text,2022-01-04\n')
+    )
+    call_command('import_news', format='csv', stdout=StringIO())
+    assert News.objects.filter(title='Third').exists()
+
+
+def test_warmup_templates_fills_cached_loader(settings):
+    options = settings.TEMPLATES[0]['OPTIONS']
+    settings.TEMPLATES = [{
+        **settings.TEMPLATES[0],
+        'OPTIONS': {**options, 'loaders': [
+            ('django.template.loaders.cached.Loader', options['loaders']),
+        ]},
+    }]
+    call_command('warmup_templates', stdout=StringIO())
+    loader = engines['django'].engine.template_loaders[0]
+    assert {'news/detail.html', 'includes/header.html'} <= set(
+        loader.get_template_cache
+    )
+
+
+def test_write_behind_comment_written_later(
+    author, author_client, news, news_detail_url, news_form_data,
+    write_behind
+):
+    response = author_client.post(news_detail_url, data=news_form_data)
+    assertRedirects(response, f'{news_detail_url}#comments')
+    assert not Comment.objects.exists()
+    write_behind.write_next_batch()
+    comment = Comment.objects.get()
+    assert comment.text == news_form_data['text']
+    assert comment.author == author
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_write_behind_comment_shown_to_author(
+    author_client, admin_client, news_detail_url, news_form_data,
+    write_behind
+):
+    etag = author_client.get(news_detail_url)['ETag']
+    author_client.post(news_detail_url, data=news_form_data)
+    response = author_client.get(
+        news_detail_url, HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.context['pending_comments'][0].text == (
+        news_form_data['text']
+    )
+    assert not admin_client.get(news_detail_url).context['pending_comments']
+    write_behind.write_next_batch()
+    response = author_client.get(news_detail_url)
+    assert not response.context['pending_comments']
+    assert len(response.context['comments']) == 1
+
+
+def test_write_behind_keeps_order(
+    author_client, news, news_detail_url, write_behind
+):
+    texts = [f'Comment {index}' for index in range(5)]
+    for text in texts:
+        author_client.post(news_detail_url, data={'text': text})
+    write_behind.write_next_batch()
+    assert list(
+        news.comment_set.order_by('created', 'id').values_list(
+            'text', flat=True
+        )
+    ) == texts
+
+
+def test_write_behind_skips_comment_of_deleted_news(
+    author_client, news, news_detail_url, news_form_data, write_behind
+):
+    other_news = News.objects.create(title='Other', text='Text')
+    author_client.post(news_detail_url, data=news_form_data)
+    author_client.post(
+        reverse('news:detail', args=(other_news.id,)), data=news_form_data
+    )
+    News.objects.filter(pk=news.pk).delete()
+    write_behind.write_next_batch()
+    assert list(Comment.objects.values_list('news', flat=True)) == [
+        other_news.id
+    ]
+
+
+def test_comment_writer_survives_unexpected_error(monkeypatch, caplog):
+    writer = CommentWriter()
+    written = []
+
+    def write(batch):
+        if not written:
+            written.append(None)
+            raise RuntimeError('Сбой')
+        written.extend(batch)
+
+    monkeypatch.setattr(writer, 'write', write)
+    monkeypatch.setattr(writer, 'flush_at_exit', lambda: None)
+    first, second = Comment(text='First'), Comment(text='Second')
+    writer.submit(first)
+    assert writer.flush(timeout=5)
+    writer.submit(second)
+    assert writer.flush(timeout=5)
+    assert writer.thread.is_alive()
+    assert written == [None, second]
+    assert 'Сбой записи пачки комментариев' in caplog.text
+
+
+def test_comment_writer_flush_is_bounded():
+    writer = CommentWriter()
+    writer.queue.put(Comment(text='Text'))
+    assert not writer.flush(timeout=0.01)
+
+
+@pytest.mark.parametrize(
+    'check, text, expected_reason',
+    (
+        (RegexCheck([r'ca+sino']), 'Play caaasino now', 'caaasino'),
+        (RegexCheck([r'ca+sino']), 'Nice news', None),
+        (LengthCheck(max_length=5), 'Too long text', 'Длиннее 5'),
+        (LengthCheck(max_length=5), 'Short', None),
+        (LinksCheck(max_links=1), 'http://a.ru www.b.ru', 'Ссылок: 2'),
+        (LinksCheck(max_links=1), 'http://a.ru', None),
+    ),
+)
+def test_moderation_checks(check, text, expected_reason):
+    reason = check.check(text)
+    if expected_reason is None:
+        assert reason is None
+    else:
+        assert expected_reason in reason
+
+
+@pytest.fixture
+def comments_to_moderate(news, author):
+    texts = ('Nice news', f'Text with {BAD_WORDS[0]}', 'http://a.ru ' * 5)
+    return Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=text) for text in texts
+    )
+
+
+def get_verdicts():
+    return list(
+        CommentVerdict.objects.order_by('comment__text').values_list(
+            'comment__text', 'flagged', 'rule'
+        )
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('comments_to_moderate')
+def test_moderate_comments_command():
+    out = StringIO()
+    call_command('moderate_comments', workers=1, batch_size=2, stdout=out)
+    assert 'Проверено комментариев: 3, отклонено: 2' in out.getvalue()
+    expected_verdicts = [
+        ('Nice news', False, ''),
+        (f'Text with {BAD_WORDS[0]}', True, 'bad_words'),
+        ('http://a.ru ' * 5, True, 'links'),
+    ]
+    assert get_verdicts() == expected_verdicts
+    call_command('moderate_comments', workers=1, stdout=StringIO())
+    assert get_verdicts() == expected_verdicts
+
+
+@pytest.mark.django_db
+def test_moderate_only_new_comments(comments_to_moderate):
+    call_command('moderate_comments', workers=1, stdout=StringIO())
+    Comment.objects.create(
+        news=comments_to_moderate[0].news,
+        author=comments_to_moderate[0].author,
+        text='New comment',
+    )
+    out = StringIO()
+    call_command(
+        'moderate_comments', workers=1, only_new=True, stdout=out
+    )
+    assert 'Проверено комментариев: 1,' in out.getvalue()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('comments_to_moderate')
+def test_rescan_comments_in_process_pool():
+    stats = rescan_comments(build_checks(), batch_size=1, workers=2)
+    assert stats == {'checked': 3, 'flagged': 2}
+    assert CommentVerdict.objects.filter(flagged=True).count() == 2
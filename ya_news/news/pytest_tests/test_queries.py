@@ -0,0 +1,416 @@
+from datetime import date, timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.cache import get_home_window, get_news_version, news_cache
+from news.models import Comment, News
+from yanews.middleware import QueryBudgetExceeded
+from yanews.paginator import EstimatedCountPaginator
+
+HOME_URL = reverse('news:home')
+BAD_PLAN_STEPS = ('USE TEMP B-TREE',)
+
+
+def get_bad_plan_steps(sql):
+    """Шаги плана запроса с полным сканированием или сортировкой."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        steps = [row[-1] for row in cursor.fetchall()]
+    return [
+        step for step in steps
+        if step.startswith('SCAN ') and ' USING ' not in step
+        or any(bad_step in step for bad_step in BAD_PLAN_STEPS)
+    ]
+
+
+def assert_view_uses_indexes(client, url, **params):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url, params)
+    for query in context.captured_queries:
+        assert not get_bad_plan_steps(query['sql']), query['sql']
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_page_uses_indexes(client):
+    assert_view_uses_indexes(client, HOME_URL)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_comments')
+def test_detail_page_uses_indexes(client, news_detail_url, settings):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    response = client.get(news_detail_url)
+    assert_view_uses_indexes(client, news_detail_url)
+    assert_view_uses_indexes(
+        client, news_detail_url, after=response.context['next_cursor']
+    )
+
+
+@pytest.mark.parametrize(
+    'method, url, data, expected_queries',
+    (
+        ('post', pytest.lazy_fixture('news_detail_url'),
+         pytest.lazy_fixture('news_form_data'), 6),
+        ('get', pytest.lazy_fixture('comment_edit_url'), None, 2),
+        ('post', pytest.lazy_fixture('comment_edit_url'),
+         pytest.lazy_fixture('updated_news_form_data'), 4),
+        ('get', pytest.lazy_fixture('comment_delete_url'), None, 2),
+        ('post', pytest.lazy_fixture('comment_delete_url'), None, 5),
+    ),
+)
+@pytest.mark.usefixtures('warm_bad_words')
+def test_comment_views_query_budget(
+    author_client, django_assert_num_queries, method, url, data,
+    expected_queries
+):
+    request = getattr(author_client, method)
+    with django_assert_num_queries(expected_queries):
+        request(url, data)
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client):
+    response = client.get(HOME_URL)
+    assert response['Server-Timing'].startswith('db;dur=')
+
+
+@pytest.mark.django_db
+def test_query_budget_exceeded(client, settings):
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(HOME_URL)
+
+
+@pytest.mark.django_db
+def test_query_budget_counts_streaming_queries(client, news, settings):
+    settings.QUERY_BUDGETS = {'news:comments_export': 1}
+    response = client.get(reverse('news:comments_export', args=(news.pk,)))
+    with pytest.raises(QueryBudgetExceeded):
+        b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_query_budget_disabled(client, settings):
+    settings.QUERY_BUDGET_ENABLED = False
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    response = client.get(HOME_URL)
+    assert 'Server-Timing' not in response
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_page_cached_for_anonymous(client, django_assert_num_queries):
+    response = client.get(HOME_URL)
+    with django_assert_num_queries(0):
+        cached_response = client.get(HOME_URL)
+    assert cached_response.content == response.content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_page_cache_invalidated_on_news_change(
+    client, news, django_capture_on_commit_callbacks
+):
+    client.get(HOME_URL)
+    news.title = 'Updated title'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    response = client.get(HOME_URL)
+    assert news.title in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_news_version_bumped_after_commit(
+    news, django_capture_on_commit_callbacks
+):
+    version = get_news_version()
+    news.title = 'Updated title'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+        assert get_news_version() == version
+    assert get_news_version() != version
+
+
+def test_home_page_cache_invalidated_on_new_comment(
+    client, author, news, news_detail_url, news_form_data,
+    django_capture_on_commit_callbacks
+):
+    client.get(HOME_URL)
+    client.force_login(author)
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(news_detail_url, data=news_form_data)
+    client.logout()
+    response = client.get(HOME_URL)
+    assert 'Комментариев: 1' in response.content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_page_keeps_header_for_authenticated(
+    author, author_client, django_assert_num_queries, settings
+):
+    settings.AUTH_USER_CACHE = True
+    author_client.get(HOME_URL)
+    with django_assert_num_queries(0):
+        response = author_client.get(HOME_URL)
+    assert author.username in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_cached_user_invalidated_on_change(author, author_client, settings):
+    settings.AUTH_USER_CACHE = True
+    author_client.get(HOME_URL)
+    author.username = 'Renamed'
+    author.save()
+    response = author_client.get(HOME_URL)
+    assert 'Renamed' in response.content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_comments')
+def test_news_detail_not_modified(
+    client, news_detail_url, django_assert_num_queries
+):
+    with django_assert_num_queries(3):
+        response = client.get(news_detail_url)
+    with django_assert_num_queries(1):
+        not_modified = client.get(
+            news_detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_comments')
+def test_news_detail_etag_changes(client, author, news, news_detail_url):
+    etags = [client.get(news_detail_url)['ETag']]
+    comment = news.comment_set.first()
+    comment.text = 'Edited text'
+    comment.save()
+    etags.append(client.get(news_detail_url)['ETag'])
+    comment.delete()
+    etags.append(client.get(news_detail_url)['ETag'])
+    client.force_login(author)
+    etags.append(client.get(news_detail_url)['ETag'])
+    assert len(set(etags)) == len(etags)
+
+
+@pytest.mark.django_db
+def test_news_detail_etag_changes_after_login(
+    client, author, news_detail_url
+):
+    client.force_login(author)
+    etag = client.get(news_detail_url)['ETag']
+    assert client.get(
+        news_detail_url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    client.logout()
+    client.force_login(author)
+    response = client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_comments')
+def test_news_detail_etag_ignores_other_news(
+    client, author, news, news_detail_url
+):
+    etag = client.get(news_detail_url)['ETag']
+    other_news = News.objects.create(title='Other', text='Text')
+    Comment.objects.create(news=other_news, author=author, text='Text')
+    cache.clear()
+    assert client.get(news_detail_url)['ETag'] == etag
+
+
+@pytest.mark.django_db
+def test_news_object_cache(news, django_assert_num_queries):
+    before = news_cache.stats()
+    assert news_cache.get('pk', news.pk) == news
+    with django_assert_num_queries(0):
+        cached = news_cache.get('pk', news.pk)
+    assert cached == news and cached is not news
+    news_cache.clear_local()
+    with django_assert_num_queries(0):
+        news_cache.get('pk', news.pk)
+    after = news_cache.stats()
+    assert {
+        name: after[name] - before[name]
+        for name in ('local_hits', 'shared_hits', 'misses')
+    } == {'local_hits': 1, 'shared_hits': 1, 'misses': 1}
+
+
+@pytest.mark.django_db
+def test_news_object_cache_invalidated_on_change(
+    news, comment, django_capture_on_commit_callbacks
+):
+    news_cache.get('pk', news.pk)
+    news.refresh_from_db()
+    news.title = 'Updated title'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    assert news_cache.get('pk', news.pk).title == 'Updated title'
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.delete()
+    assert news_cache.get('pk', news.pk).comment_count == 0
+    with django_capture_on_commit_callbacks(execute=True):
+        news.delete()
+    assert news_cache.get('pk', news.pk) is None
+
+
+@pytest.mark.django_db
+def test_news_object_cache_invalidated_after_commit(
+    news, django_capture_on_commit_callbacks
+):
+    title = news.title
+    news_cache.get('pk', news.pk)
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.filter(pk=news.pk).update(title='Updated title')
+        news_cache.invalidate(news.pk)
+        news_cache.clear_local()
+        assert news_cache.get('pk', news.pk).title == title
+    assert news_cache.get('pk', news.pk).title == 'Updated title'
+
+
+def get_admin_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_admin_news_page_queries_independent_of_comments(
+    admin_client, news, author
+):
+    url = reverse('admin:news_news_change', args=(news.id,))
+    Comment.objects.create(news=news, author=author, text='Text')
+    admin_client.get(url)
+    expected_queries = get_admin_queries(admin_client, url)
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Text {index}')
+        for index in range(50)
+    )
+    assert get_admin_queries(admin_client, url) == expected_queries
+
+
+@pytest.mark.django_db
+def test_admin_comments_filtered_by_news(admin_client, news, comment):
+    other_news = News.objects.create(title='Other', text='Text')
+    other_comment = Comment.objects.create(
+        news=other_news, author=comment.author, text='Other comment'
+    )
+    response = admin_client.get(
+        reverse('admin:news_comment_changelist'),
+        {'news__id__exact': news.id},
+    )
+    comments = list(response.context['cl'].result_list)
+    assert comments == [comment]
+    assert other_comment not in comments
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_estimated_count_paginator(settings, django_assert_num_queries):
+    settings.ADMIN_EXACT_COUNT_LIMIT = 0
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    News.objects.create(title='Not analyzed', text='Text')
+    paginator = EstimatedCountPaginator(News.objects.all(), 5)
+    with django_assert_num_queries(1):
+        assert paginator.count == settings.NEWS_COUNT_ON_HOME_PAGE + 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_paginator_caches_count_without_statistics(
+    django_assert_num_queries
+):
+    EstimatedCountPaginator(News.objects.all(), 5).count
+    News.objects.create(title='New', text='Text')
+    with django_assert_num_queries(1):
+        count = EstimatedCountPaginator(News.objects.all(), 5).count
+    assert count == News.objects.count() - 1
+    filtered = News.objects.filter(title='New')
+    assert EstimatedCountPaginator(filtered, 5).count == 1
+
+
+def get_expected_home_titles(size):
+    return list(
+        News.objects.order_by('-date', 'id').values_list(
+            'title', flat=True
+        )[:size]
+    )
+
+
+def get_home_titles():
+    return [news.title for news in get_home_window()]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_window_updated_without_queries(
+    settings, author, django_assert_num_queries,
+    django_capture_on_commit_callbacks
+):
+    get_home_window()
+    with django_capture_on_commit_callbacks(execute=True):
+        fresh_news = News.objects.create(
+            title='Fresh', text='Text', date=date.today() + timedelta(days=1)
+        )
+        Comment.objects.create(news=fresh_news, author=author, text='Text')
+    with django_assert_num_queries(0):
+        home_news = get_home_window()
+    assert [news.title for news in home_news] == get_expected_home_titles(
+        settings.NEWS_COUNT_ON_HOME_PAGE
+    )
+    assert home_news[0].comment_count == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_window_follows_news_changes(
+    settings, django_capture_on_commit_callbacks
+):
+    size = settings.NEWS_COUNT_ON_HOME_PAGE
+    get_home_window()
+    first_news = News.objects.get(title=get_expected_home_titles(1)[0])
+    first_news.date = date.today() - timedelta(days=365)
+    with django_capture_on_commit_callbacks(execute=True):
+        first_news.save()
+    assert get_home_titles() == get_expected_home_titles(size)
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.get(title=get_expected_home_titles(1)[0]).delete()
+    assert get_home_titles() == get_expected_home_titles(size)
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.create(title='Older', text='Text', date=date(2000, 1, 1))
+    assert get_home_titles() == get_expected_home_titles(size)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_window_not_patched_on_rollback():
+    home_titles = get_home_titles()
+    with pytest.raises(IntegrityError):
+        with transaction.atomic():
+            News.objects.create(
+                title='Fresh', text='Text',
+                date=date.today() + timedelta(days=1),
+            )
+            News.objects.create(pk=News.objects.first().pk, title='Copy')
+    assert get_home_titles() == home_titles
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('bulk_news')
+def test_home_window_rebuilt_when_size_changes(settings):
+    get_home_window()
+    settings.NEWS_COUNT_ON_HOME_PAGE = 3
+    assert get_home_titles() == get_expected_home_titles(3)
+    settings.NEWS_COUNT_ON_HOME_PAGE = 20
+    assert get_home_titles() == get_expected_home_titles(20)
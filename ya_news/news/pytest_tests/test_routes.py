@@ -8,7 +8,7 @@ from pytest_django.asserts import assertRedirects
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'name',
-    ('news:home', 'users:login', 'users:logout', 'users:signup')
+    ('news:home', 'news:search', 'users:login', 'users:logout', 'users:signup')
 )
 def test_pages_availability_for_anonymous_user(client, name):
     url = reverse(name)
@@ -0,0 +1,111 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+
+from .models import Comment, CommentVerdict
+
+REASON_MAX_LENGTH = CommentVerdict._meta.get_field('reason').max_length
+
+_worker_checks = None
+
+
+def moderate(checks, texts):
+    """
+    Вердикты для пачки текстов: (проверка, причина) или None.
+
+    Каждая проверка проходит по всей пачке сразу; у текста остаётся
+    причина первой сработавшей проверки.
+    """
+    verdicts = [None] * len(texts)
+    for check in checks:
+        for index, reason in enumerate(check.check_batch(texts)):
+            if reason is not None and verdicts[index] is None:
+                verdicts[index] = (check.name, reason)
+    return verdicts
+
+
+def init_worker(checks):
+    global _worker_checks
+    _worker_checks = checks
+
+
+def moderate_in_worker(batch):
+    ids, texts = zip(*batch)
+    return ids, moderate(_worker_checks, texts)
+
+
+def read_batches(queryset, batch_size):
+    """
+    Пары (id, текст) комментариев пачками в порядке id.
+
+    Каждая пачка — отдельный запрос по id после предыдущей, так что
+    долгое чтение не держит открытым курсор и снимок базы.
+    """
+    queryset = queryset.order_by('id').values_list('id', 'text')
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+
+def record_verdicts(ids, verdicts):
+    """
+    Заменяет вердикты комментариев пачки одной короткой транзакцией.
+
+    Комментарии, удалённые во время перепроверки, пропускаются.
+    """
+    with transaction.atomic():
+        existing = set(
+            Comment.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        CommentVerdict.objects.filter(comment_id__in=ids).delete()
+        CommentVerdict.objects.bulk_create(
+            CommentVerdict(
+                comment_id=pk,
+                flagged=verdict is not None,
+                rule=verdict[0] if verdict else '',
+                reason=verdict[1][:REASON_MAX_LENGTH] if verdict else '',
+            )
+            for pk, verdict in zip(ids, verdicts) if pk in existing
+        )
+
+
+def rescan_comments(checks, queryset=None, batch_size=2000, workers=1):
+    """
+    Перепроверяет комментарии и записывает вердикты.
+
+    Тексты читаются и вердикты пишутся в этом процессе, а проверки
+    при workers > 1 выполняются в пуле процессов. В работе не больше
+    2 * workers пачек, поэтому память не растёт с числом комментариев.
+    Возвращает число проверенных и отклонённых комментариев.
+    """
+    if queryset is None:
+        queryset = Comment.objects.all()
+    stats = {'checked': 0, 'flagged': 0}
+
+    def record(ids, verdicts):
+        record_verdicts(ids, verdicts)
+        stats['checked'] += len(ids)
+        stats['flagged'] += sum(verdict is not None for verdict in verdicts)
+
+    batches = read_batches(queryset, batch_size)
+    if workers <= 1:
+        for batch in batches:
+            ids, texts = zip(*batch)
+            record(ids, moderate(checks, texts))
+        return stats
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(checks,)
+    ) as pool:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append(pool.submit(moderate_in_worker, batch))
+            if len(in_flight) >= 2 * workers:
+                record(*in_flight.popleft().result())
+        while in_flight:
+            record(*in_flight.popleft().result())
+    return stats
@@ -0,0 +1,109 @@
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.migrations.loader import MigrationLoader
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 16
+
+SEARCH_SQL = '''
+    SELECT news_news.id, news_news.title, news_news.date,
+        snippet(news_news_fts, -1, %s, %s, '…', %s) AS snippet
+    FROM news_news_fts
+    JOIN news_news ON news_news.id = news_news_fts.rowid
+    WHERE news_news_fts MATCH %s
+    ORDER BY bm25(news_news_fts)
+    LIMIT %s
+'''
+REBUILD_SQL = "INSERT INTO news_news_fts(news_news_fts) VALUES ('rebuild')"
+SEARCH_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE news_news_fts USING fts5(
+        title, text,
+        content='news_news', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER news_news_fts_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_delete AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_update AFTER UPDATE OF title, text
+    ON news_news BEGIN
+        INSERT INTO news_news_fts(news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+]
+
+
+def build_match_query(query):
+    """
+    Превращает ввод пользователя в запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в тексте
+    запроса не ломали его синтаксис; совпасть должны все слова.
+    """
+    return ' '.join(
+        '"{}"'.format(term.replace('"', '""')) for term in query.split()
+    )
+
+
+def highlight(snippet):
+    """Экранирует фрагмент текста и подсвечивает найденные слова."""
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+def search_news(query, limit):
+    """Новости, подходящие под запрос, от наиболее релевантной."""
+    match_query = build_match_query(query)
+    if not match_query:
+        return []
+    results = list(News.objects.raw(SEARCH_SQL, (
+        HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS, match_query, limit
+    )))
+    for news in results:
+        news.snippet = highlight(news.snippet)
+    return results
+
+
+def rebuild_search_index():
+    """Заново строит поисковый индекс по таблице новостей."""
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_SQL)
+
+
+def create_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Создаёт поисковый индекс для приложения без миграций.
+
+    Обычно индекс создаёт миграция. Когда миграции отключены
+    (pytest --nomigrations), таблицы строятся по моделям, и индекс
+    создаётся здесь по сигналу post_migrate.
+    """
+    module_name, _ = MigrationLoader.migrations_module(sender.label)
+    database = connections[using]
+    if module_name is not None or (
+        'news_news_fts' in database.introspection.table_names()
+    ):
+        return
+    with database.cursor() as cursor:
+        for sql in SEARCH_INDEX_SQL:
+            cursor.execute(sql)
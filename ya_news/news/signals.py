@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .auth import invalidate_cached_user
+from .cache import (
+    bump_news_version, change_home_window_comment_count, news_cache,
+    remove_from_home_window, update_home_window
+)
+from .models import BadWord, Comment, CommentVerdict, News
+from .moderation import bad_words
+
+
+def change_comment_count(news_id, delta):
+    """
+    Изменяет счётчик комментариев новости одним UPDATE.
+
+    Значение вычисляется в базе через F-выражение, поэтому
+    параллельные изменения счётчика не теряются.
+    """
+    News.objects.filter(pk=news_id).update(
+        comment_count=F('comment_count') + delta
+    )
+    change_home_window_comment_count(news_id, delta)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        change_comment_count(instance.news_id, 1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_edit(sender, instance, created, **kwargs):
+    """Правка комментария меняет ETag страницы новости."""
+    if not created:
+        News.objects.filter(pk=instance.news_id).update(
+            comments_revision=F('comments_revision') + 1
+        )
+
+
+def delete_comments(comments, delete, news_id=None):
+    """
+    Удаляет комментарии функцией delete, обновляя счётчики и кэши.
+
+    Если все комментарии относятся к одной новости (news_id, когда она
+    уже известна), они сначала удаляются, а счётчик уменьшается на
+    число действительно удалённых строк: повторное удаление того же
+    комментария его не меняет. Счётчики нескольких новостей
+    уменьшаются до удаления одним UPDATE с подзапросом. Вердикты
+    модерации удаляются одним DELETE.
+    """
+    comments = comments.order_by()
+    with transaction.atomic(savepoint=False):
+        if news_id is None:
+            news_counts = dict(
+                comments.values_list('news').annotate(count=Count('pk'))
+            )
+            if not news_counts:
+                return 0, {}
+            if len(news_counts) == 1:
+                news_id, = news_counts
+            else:
+                News.objects.filter(pk__in=news_counts).update(
+                    comment_count=F('comment_count') - Subquery(
+                        comments.filter(news=OuterRef('pk')).values(
+                            'news'
+                        ).annotate(count=Count('pk')).values('count')
+                    )
+                )
+        CommentVerdict.objects.filter(comment__in=comments).delete()
+        deleted = delete()
+        if news_id is not None:
+            count = deleted[1].get(Comment._meta.label, 0)
+            news_counts = {news_id: count} if count else {}
+            if count:
+                News.objects.filter(pk=news_id).update(
+                    comment_count=F('comment_count') - count
+                )
+    bump_news_version()
+    for news_id, count in news_counts.items():
+        news_cache.invalidate(news_id)
+        change_home_window_comment_count(news_id, -count)
+    return deleted
+
+
+@receiver(pre_delete, sender=get_user_model())
+def delete_user_comments(sender, instance, **kwargs):
+    """Комментарии пользователя удаляются до каскада, со счётчиками."""
+    Comment.objects.filter(author=instance).delete()
+
+
+@receiver(pre_delete, sender=News)
+def delete_news_verdicts(sender, instance, **kwargs):
+    CommentVerdict.objects.filter(comment__news=instance).delete()
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+def invalidate_news_cache(sender, instance, **kwargs):
+    bump_news_version()
+    news_cache.invalidate(
+        instance.pk if sender is News else instance.news_id
+    )
+
+
+@receiver(post_save, sender=News)
+def update_home_news(sender, instance, **kwargs):
+    update_home_window(instance.pk)
+
+
+@receiver(post_delete, sender=News)
+def remove_home_news(sender, instance, **kwargs):
+    remove_from_home_window(instance.pk)
+
+
+@receiver(post_save, sender=BadWord)
+@receiver(post_delete, sender=BadWord)
+def reload_bad_words(sender, **kwargs):
+    bad_words.invalidate()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
@@ -1,12 +1,26 @@
+from django.conf import settings
 from django.urls import path
 
 from news import views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    news_list_view = views.AsyncNewsList
+    news_detail_view = views.AsyncNewsDetailView
+else:
+    news_list_view = views.NewsList
+    news_detail_view = views.NewsDetailView
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list_view.as_view(), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', news_detail_view.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/export/',
+        views.CommentExport.as_view(),
+        name='comments_export'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
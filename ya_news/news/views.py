@@ -1,39 +1,177 @@
+import asyncio
+from functools import update_wrapper
+from hashlib import md5
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .cache import (
+    get_home_page, get_home_window, get_news_version, news_cache,
+    set_home_page
+)
+from .comment_queue import comment_writer
+from .executor import run_in_db_thread
+from .export import COMMENT_EXPORT_FIELDS, EXPORT_FORMATS
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import paginate_comments
+from .search import search_news
+
+
+def get_news_or_404(pk):
+    """Новость из кэша объектов."""
+    news = news_cache.get('pk', pk)
+    if news is None:
+        raise Http404('Новость не найдена.')
+    return news
 
 
 class NewsList(generic.ListView):
-    """Список новостей."""
+    """
+    Список новостей.
+
+    Анонимным пользователям страница отдаётся из кэша целиком,
+    остальным — из кэша берётся только окно новостей главной, а шапка
+    с именем пользователя рендерится заново.
+    """
     model = News
     template_name = 'news/home.html'
 
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        cache_version = get_news_version()
+        content = get_home_page(cache_version)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs).render()
+        set_home_page(
+            cache_version,
+            response.content,
+            settings.NEWS_HOME_PAGE_CACHE_TIMEOUT,
+        )
+        return response
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
+        Их количество определяется в настройках проекта. Новости
+        берутся из закэшированного окна get_home_window, число
+        комментариев хранится в самой новости.
+        """
+        return get_home_window()
+
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        """
+        Выводим новости, подходящие под запрос `?q=`, по релевантности.
+
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['results'] = search_news(
+            query, settings.SEARCH_RESULTS_COUNT
+        )
+        return context
 
 
-class NewsDetail(generic.DetailView):
+def get_comments_page(news, request):
+    """
+    Одна страница комментариев после курсора из `?after=`.
+
+    Размер страницы определяется в настройках проекта. На последней
+    странице автору показываются и его ещё не записанные комментарии.
+    """
+    try:
+        comments, next_cursor = paginate_comments(
+            news.comment_set.select_related('author'),
+            request.GET.get('after'),
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        )
+    except ValueError:
+        raise Http404('Некорректный курсор комментариев.')
+    pending_comments = []
+    if next_cursor is None and request.user.is_authenticated:
+        pending_comments = comment_writer.get_pending(
+            news.pk, request.user.pk
+        )
+    return {
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'pending_comments': pending_comments,
+    }
+
+
+class CommentPageMixin:
+    """Добавляет в контекст страницу комментариев к новости."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(get_comments_page(self.object, self.request))
+        return context
+
+
+def news_detail_etag(request, pk, **kwargs):
+    """
+    ETag страницы новости без загрузки комментариев.
+
+    Строится только по состоянию самой новости в базе: её полям,
+    числу комментариев, счётчику их правок и id последнего из них.
+    Поэтому он одинаков во всех процессах и не меняется от изменений
+    других новостей. Добавляются пользователь, для которого рендерится
+    страница, и его незаписанные комментарии, а для вошедшего
+    пользователя — ключ сессии: при входе меняются и он, и CSRF-токен
+    формы комментария, так что страница со старым токеном не
+    отдаётся ответом 304.
+    """
+    last_comment = Comment.objects.filter(
+        news=OuterRef('pk')
+    ).order_by('-created', '-id').values('id')[:1]
+    state = News.objects.filter(pk=pk).annotate(
+        last_comment=Subquery(last_comment)
+    ).values_list(
+        'title', 'text', 'date', 'comment_count', 'comments_revision',
+        'last_comment',
+    ).first()
+    if state is None:
+        return None
+    pending = tuple(
+        comment.queue_number
+        for comment in comment_writer.get_pending(pk, request.user.pk)
+    )
+    session_key = (
+        request.session.session_key
+        if request.user.is_authenticated else None
+    )
+    return md5(
+        repr((state, request.user.pk, session_key, pending)).encode()
+    ).hexdigest()
+
+
+@method_decorator(condition(etag_func=news_detail_etag), name='get')
+class NewsDetail(CommentPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_news_or_404(self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +182,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -51,6 +190,9 @@ class NewsComment(
     form_class = CommentForm
     template_name = 'news/detail.html'
 
+    def get_object(self, queryset=None):
+        return get_news_or_404(self.kwargs['pk'])
+
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
@@ -59,12 +201,17 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        if settings.COMMENT_WRITE_BEHIND:
+            comment_writer.submit(comment)
+        else:
+            with transaction.atomic():
+                comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +230,19 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Новость нужна шаблонам, поэтому загружается тем же запросом.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +254,126 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class CommentExport(generic.View):
+    """Выгрузка комментариев новости в формате `?format=`."""
+
+    def get(self, request, pk):
+        """
+        Комментарии читаются из базы пачками и сразу уходят клиенту.
+
+        Экспорт не держит в памяти ни всех комментариев, ни всего ответа.
+        """
+        export_format = request.GET.get('format', 'json')
+        if export_format not in EXPORT_FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        if not News.objects.filter(pk=pk).exists():
+            raise Http404('Новость не найдена.')
+        export, content_type = EXPORT_FORMATS[export_format]
+        rows = Comment.objects.filter(news_id=pk).order_by(
+            'created', 'id'
+        ).values_list(*COMMENT_EXPORT_FIELDS).iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+        response = StreamingHttpResponse(
+            export(rows, COMMENT_EXPORT_FIELDS), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="comments-{pk}.{export_format}"'
+        )
+        return response
+
+
+class AsyncView(generic.View):
+    """
+    Представление с асинхронными обработчиками методов.
+
+    В Django 3.2 View.as_view() возвращает синхронную функцию, и
+    обработчик запроса получил бы от неё невыполненную корутину.
+    Здесь as_view() возвращает корутинную функцию, которую Django
+    вызывает в цикле событий и дожидается.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            # Ответы вроде 405 и OPTIONS dispatch отдаёт синхронно.
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        update_wrapper(async_view, view)
+        return async_view
+
+
+class AsyncNewsList(AsyncView):
+    """
+    Асинхронный вариант NewsList для работы под ASGI.
+
+    Запросы к базе выполняются в пуле потоков run_in_db_thread.
+    """
+    template_name = NewsList.template_name
+
+    async def get(self, request, *args, **kwargs):
+        is_authenticated = await run_in_db_thread(
+            lambda: request.user.is_authenticated
+        )
+        cache_version = get_news_version()
+        if not is_authenticated:
+            content = get_home_page(cache_version)
+            if content is not None:
+                return HttpResponse(content)
+        news_list = await run_in_db_thread(get_home_window)
+        response = TemplateResponse(request, self.template_name, {
+            'object_list': news_list,
+            'news_list': news_list,
+        }).render()
+        if not is_authenticated:
+            set_home_page(
+                cache_version,
+                response.content,
+                settings.NEWS_HOME_PAGE_CACHE_TIMEOUT,
+            )
+        return response
+
+
+class AsyncNewsDetailView(AsyncView):
+    """
+    Асинхронный вариант NewsDetailView для работы под ASGI.
+
+    Страница новости собирается в пуле потоков run_in_db_thread,
+    отправка комментария выполняется синхронным NewsComment там же.
+    """
+    template_name = NewsDetail.template_name
+
+    async def get(self, request, pk):
+        etag = await run_in_db_thread(news_detail_etag, request, pk)
+        if etag is not None:
+            etag = quote_etag(etag)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+        context = await run_in_db_thread(self.get_page_context, request, pk)
+        response = TemplateResponse(
+            request, self.template_name, context
+        ).render()
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+    async def post(self, request, *args, **kwargs):
+        return await run_in_db_thread(
+            NewsComment.as_view(), request, *args, **kwargs
+        )
+
+    def get_page_context(self, request, pk):
+        news = get_news_or_404(pk)
+        context = {'news': news, 'object': news}
+        context.update(get_comments_page(news, request))
+        if request.user.is_authenticated:
+            context['form'] = CommentForm()
+        return context
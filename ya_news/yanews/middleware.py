@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+request_query_counter = ContextVar('request_query_counter', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем разрешено."""
+
+
+class QueryCounter:
+    """Считает запросы к базе и время их выполнения."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+@contextmanager
+def count_queries(counter=None):
+    """
+    Считает запросы текущего потока.
+
+    Без явного счётчика используется счётчик обрабатываемого запроса,
+    если он есть: так учитываются запросы асинхронных представлений,
+    выполненные в других потоках.
+    """
+    counter = counter or request_query_counter.get()
+    with ExitStack() as stack:
+        if counter is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+        yield
+
+
+class QueryBudgetMiddleware:
+    """
+    Следит за числом SQL-запросов на каждый запрос к сайту.
+
+    Включается настройкой QUERY_BUDGET_ENABLED. Время работы с базой
+    отдаётся в заголовке Server-Timing. Бюджеты задаются в настройке
+    QUERY_BUDGETS по имени URL; при превышении пишется предупреждение
+    в лог, а при QUERY_BUDGET_STRICT = True поднимается
+    QueryBudgetExceeded.
+
+    Запросы потокового ответа выполняются уже после отправки
+    заголовков: они не попадают в Server-Timing, но учитываются
+    в бюджете, который проверяется после выдачи всего ответа.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Так же помечает себя асинхронным MiddlewareMixin в Django.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        with count_queries(counter):
+            response = self.get_response(request)
+        return self.process_response(request, response, counter)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        token = request_query_counter.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_query_counter.reset(token)
+        return self.process_response(request, response, counter)
+
+    def process_response(self, request, response, counter):
+        response['Server-Timing'] = (
+            f'db;dur={counter.duration * 1000:.1f};'
+            f'desc="{counter.count} queries"'
+        )
+        if response.streaming:
+            response.streaming_content = self.count_streaming_queries(
+                request, response.streaming_content, counter
+            )
+        else:
+            self.check_budget(request, counter.count)
+        return response
+
+    def count_streaming_queries(self, request, content, counter):
+        """Отдаёт части ответа, считая запросы, выполненные для них."""
+        content = iter(content)
+        while True:
+            with count_queries(counter):
+                part = next(content, None)
+            if part is None:
+                break
+            yield part
+        self.check_budget(request, counter.count)
+
+    def check_budget(self, request, count):
+        match = request.resolver_match
+        if match is None:
+            return
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(match.view_name)
+        if budget is None or count <= budget:
+            return
+        message = (
+            f'{match.view_name}: {count} SQL-запросов '
+            f'при бюджете {budget} ({request.method} {request.path})'
+        )
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,170 @@
+import copy
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class ObjectCache:
+    """
+    Кэш объектов модели по pk или уникальному полю (например, slug).
+
+    Первый уровень — LRU-словарь в памяти процесса: записи живут
+    OBJECT_CACHE_LOCAL_TIMEOUT секунд, словарь держит не больше
+    OBJECT_CACHE_LOCAL_SIZE объектов. Второй уровень — кэш Django,
+    общий для процессов: объект лежит под ключом с версией, которая
+    меняется при каждом изменении объекта.
+
+    Версия читается до загрузки объекта из базы, поэтому объект,
+    прочитанный параллельно с изменением, попадает под старую версию
+    и никому не достанется. Другие процессы увидят изменение на первом
+    уровне не позже, чем через OBJECT_CACHE_LOCAL_TIMEOUT.
+
+    Каждый вызов get возвращает отдельную копию объекта: представления
+    меняют его поля, например в UpdateView.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.prefix = f'objects:{model._meta.label_lower}'
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = Counter()
+
+    def get(self, field, value):
+        """Объект с `field == value` или None, если его нет в базе."""
+        obj = self.get_local(field, value)
+        if obj is not None:
+            self.count('local_hits')
+            return copy.copy(obj)
+        obj = self.get_shared(field, value)
+        if obj is not None:
+            self.count('shared_hits')
+        else:
+            self.count('misses')
+            obj = self.load(field, value)
+            if obj is None:
+                return None
+        self.set_local(field, value, obj)
+        return copy.copy(obj)
+
+    def invalidate(self, pk):
+        """
+        Делает устаревшими все записи объекта на обоих уровнях.
+
+        Внутри транзакции записи сбрасываются после её фиксации: иначе
+        параллельный запрос успел бы положить под новую версию объект,
+        прочитанный из базы до фиксации изменений.
+        """
+        transaction.on_commit(lambda: self.invalidate_now(pk))
+
+    def invalidate_now(self, pk):
+        cache.set(
+            self.version_key(pk), time.time_ns(),
+            settings.OBJECT_CACHE_TIMEOUT,
+        )
+        with self.lock:
+            for key in [
+                key for key, (_, obj) in self.local.items() if obj.pk == pk
+            ]:
+                del self.local[key]
+
+    def clear_local(self):
+        with self.lock:
+            self.local.clear()
+
+    def stats(self):
+        """Попадания и промахи кэша в этом процессе."""
+        with self.lock:
+            return {
+                'local_hits': self.counters['local_hits'],
+                'shared_hits': self.counters['shared_hits'],
+                'misses': self.counters['misses'],
+                'local_size': len(self.local),
+            }
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def version_key(self, pk):
+        return f'{self.prefix}:version:{pk}'
+
+    def object_key(self, pk, version):
+        return f'{self.prefix}:{pk}:{version}'
+
+    def index_key(self, field, value):
+        return f'{self.prefix}:{field}:{value}'
+
+    def get_local(self, field, value):
+        key = (field, value)
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is None:
+                return None
+            expires_at, obj = entry
+            if expires_at < time.monotonic():
+                del self.local[key]
+                return None
+            self.local.move_to_end(key)
+            return obj
+
+    def set_local(self, field, value, obj):
+        expires_at = time.monotonic() + settings.OBJECT_CACHE_LOCAL_TIMEOUT
+        with self.lock:
+            self.local[(field, value)] = (expires_at, obj)
+            self.local.move_to_end((field, value))
+            while len(self.local) > settings.OBJECT_CACHE_LOCAL_SIZE:
+                self.local.popitem(last=False)
+
+    def get_shared(self, field, value):
+        pk = value if field == 'pk' else cache.get(
+            self.index_key(field, value)
+        )
+        if pk is None:
+            return None
+        version = cache.get(self.version_key(pk))
+        if version is None:
+            return None
+        obj = cache.get(self.object_key(pk, version))
+        # Поле могло смениться: тогда по старому значению объекта нет.
+        if obj is None or getattr(obj, field) != value:
+            return None
+        return obj
+
+    def load(self, field, value):
+        """
+        Читает объект из базы и кладёт его в общий кэш.
+
+        Для поиска не по pk сначала узнаём pk (из кэша или базы), чтобы
+        прочитать версию до загрузки самого объекта.
+        """
+        manager = self.model._default_manager
+        timeout = settings.OBJECT_CACHE_TIMEOUT
+        pk = value if field == 'pk' else cache.get(
+            self.index_key(field, value)
+        )
+        for _ in range(2):
+            if pk is None:
+                pk = manager.filter(**{field: value}).values_list(
+                    'pk', flat=True
+                ).first()
+                if pk is None:
+                    return None
+            version = cache.get_or_set(
+                self.version_key(pk), time.time_ns, timeout
+            )
+            obj = manager.filter(pk=pk).order_by().first()
+            if obj is not None and getattr(obj, field) == value:
+                cache.set(self.object_key(pk, version), obj, timeout)
+                if field != 'pk':
+                    cache.set(self.index_key(field, value), pk, timeout)
+                return obj
+            if field == 'pk':
+                return None
+            # Индекс устарел: значение поля у объекта сменилось.
+            pk = None
+        return None
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+COUNT_KEY = 'admin:count:{table}'
+
+
+def estimate_table_rows(model, using):
+    """
+    Оценка числа строк таблицы по статистике базы или None.
+
+    SQLite хранит её в sqlite_stat1 после ANALYZE (или PRAGMA optimize),
+    PostgreSQL — в pg_class.reltuples после VACUUM/ANALYZE.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples FROM pg_class WHERE relname = %s'
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # Таблицы sqlite_stat1 нет, пока ANALYZE ни разу не запускался.
+        return None
+    if row is None:
+        return None
+    rows = int(str(row[0]).split()[0].split('.')[0])
+    return rows if rows >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор админки, не считающий COUNT(*) по всей таблице.
+
+    Для отфильтрованного списка число объектов считается как обычно:
+    фильтр сужает выборку по индексу. Для всей таблицы берётся оценка
+    из статистики базы, если таблица больше ADMIN_EXACT_COUNT_LIMIT,
+    а без статистики — точное число, закэшированное на
+    ADMIN_COUNT_CACHE_TIMEOUT секунд.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query') or queryset.query.where:
+            return super().count
+        estimate = estimate_table_rows(queryset.model, queryset.db)
+        if estimate is not None and (
+            estimate > settings.ADMIN_EXACT_COUNT_LIMIT
+        ):
+            return estimate
+        return cache.get_or_set(
+            COUNT_KEY.format(table=queryset.model._meta.db_table),
+            queryset.count,
+            settings.ADMIN_COUNT_CACHE_TIMEOUT,
+        )
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -6,7 +7,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
-DEBUG = True
+# DJANGO_PRODUCTION=1 включает боевой режим: без отладки и с кэшем шаблонов.
+PRODUCTION = os.environ.get('DJANGO_PRODUCTION') == '1'
+
+DEBUG = not PRODUCTION
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
@@ -21,6 +25,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -32,12 +37,21 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yanews.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -53,11 +67,52 @@ WSGI_APPLICATION = 'yanews.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yanews.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        # Тестовая база в памяти: у каждого процесса pytest-xdist своя.
+        'TEST': {'NAME': ':memory:'},
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 5000,
+                'cache_size': -64 * 1024,
+                'mmap_size': 256 * 1024 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# cached_db читает сессию из кэша и обращается к базе только при промахе.
+# С 'django.contrib.sessions.backends.cache' сессии живут только в
+# LocMemCache — LRU-кэше в памяти процесса — и теряются при перезапуске.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = ['news.auth.CachedModelBackend']
+
+# Пользователи в кэше (news.auth.CachedModelBackend). Включайте только
+# с общим кэшем (Memcached, Redis): с LocMemCache каждый процесс хранит
+# свою копию, и изменения пользователя, в том числе блокировка, не видны
+# другим процессам до AUTH_USER_CACHE_TIMEOUT.
+AUTH_USER_CACHE = False
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Кэш объектов: LRU в памяти процесса перед общим кэшем Django.
+OBJECT_CACHE_LOCAL_SIZE = 1000
+
+OBJECT_CACHE_LOCAL_TIMEOUT = 5
+
+OBJECT_CACHE_TIMEOUT = 60 * 5
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +135,69 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+NEWS_HOME_PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Окно новостей главной поправляется сигналами после фиксации транзакции;
+# таймаут ограничивает расхождение, если правки из разных процессов
+# пересеклись. Окно лежит в CACHES: с LocMemCache у каждого процесса своё
+# окно, и правки из других процессов до него не доходят — оно устаревает
+# на время до NEWS_HOME_WINDOW_TIMEOUT.
+NEWS_HOME_WINDOW_TIMEOUT = 60
+
+BAD_WORDS_FILE = None
+
+# Перепроверка комментариев командой moderate_comments: имя проверки из
+# news.moderation.MODERATION_CHECKS и аргументы её конструктора.
+COMMENT_MODERATION_CHECKS = {
+    'bad_words': {},
+    'length': {'max_length': 2000},
+    'links': {'max_links': 3},
+}
+
+COMMENT_MODERATION_BATCH_SIZE = 2000
+
+NEWS_ASYNC_VIEWS = False
+
+NEWS_ASYNC_DB_THREADS = 8
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+# Отложенная запись комментариев фоновым потоком, см.
+# news.comment_queue.CommentWriter. Очередь у каждого процесса своя:
+# незаписанный комментарий автор видит, только пока его запросы попадают
+# в процесс, принявший комментарий. При нескольких процессах сервера
+# комментарий может пропасть со страницы до записи в базу.
+COMMENT_WRITE_BEHIND = False
+
+COMMENT_QUEUE_BATCH_SIZE = 100
+
+# Сколько секунд завершающийся процесс ждёт записи очереди комментариев.
+COMMENT_QUEUE_EXIT_TIMEOUT = 10
+
+SEARCH_RESULTS_COUNT = 20
+
+EXPORT_CHUNK_SIZE = 2000
+
+ADMIN_LATEST_COMMENTS_COUNT = 20
+
+# Списки админки не считают COUNT(*) по большим таблицам, см.
+# yanews.paginator.EstimatedCountPaginator.
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+# Подсчёт запросов и проверка QUERY_BUDGETS middleware QueryBudgetMiddleware
+# нужны при разработке и в тестах, в боевом режиме middleware отключается.
+QUERY_BUDGET_ENABLED = DEBUG
+
+QUERY_BUDGETS = {
+    'news:home': 3,
+    'news:detail': 7,
+    'news:edit': 4,
+    'news:delete': 5,
+    'news:search': 3,
+    'news:comments_export': 2,
+}
+
+QUERY_BUDGET_STRICT = False
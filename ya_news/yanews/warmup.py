@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from django.template import engines
+
+TEMPLATE_SUFFIXES = ('.html', '.txt', '.xml')
+
+
+def iter_template_names(engine):
+    """Имена всех шаблонов, которые видят загрузчики движка."""
+    seen = set()
+    for loader in engine.engine.template_loaders:
+        for directory in loader.get_dirs():
+            directory = Path(directory)
+            for path in sorted(directory.rglob('*')):
+                if path.suffix not in TEMPLATE_SUFFIXES:
+                    continue
+                name = path.relative_to(directory).as_posix()
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+
+def warmup_templates():
+    """
+    Разбирает все шаблоны проекта заранее.
+
+    С кэширующим загрузчиком разобранные шаблоны остаются в памяти
+    процесса, и первые запросы после запуска не читают их с диска.
+    Возвращает имена загруженных шаблонов.
+    """
+    names = []
+    for engine in engines.all():
+        for name in iter_template_names(engine):
+            engine.get_template(name)
+            names.append(name)
+    return names
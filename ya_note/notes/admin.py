@@ -1,5 +1,15 @@
 from django.contrib import admin
 
+from yanote.paginator import EstimatedCountPaginator
+
 from .models import Note
 
-admin.site.register(Note)
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug', 'author')
+    list_select_related = ('author',)
+    search_fields = ('=slug',)
+    autocomplete_fields = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
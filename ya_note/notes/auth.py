@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_KEY = 'auth:user:{}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который хранит пользователей в кэше.
+
+    AuthenticationMiddleware загружает пользователя на каждый запрос;
+    при AUTH_USER_CACHE = True он берётся из кэша без запроса
+    к auth_user. Запись живёт AUTH_USER_CACHE_TIMEOUT секунд и
+    удаляется при изменении пользователя. Включать кэш можно только
+    с общим для всех процессов бэкендом CACHES: иначе заблокированный
+    или сменивший пароль пользователь остаётся в кэше других процессов.
+    """
+
+    def get_user(self, user_id):
+        if not settings.AUTH_USER_CACHE:
+            return super().get_user(user_id)
+        key = USER_CACHE_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,5 @@
+from yanote.object_cache import ObjectCache
+
+from .models import Note
+
+note_cache = ObjectCache(Note)
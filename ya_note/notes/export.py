@@ -0,0 +1,76 @@
+import csv
+import json
+import zipfile
+
+EXPORT_FIELDS = ('id', 'title', 'text', 'slug')
+
+
+class StreamBuffer:
+    """
+    Файл только для записи: накопленное забирается методом `pop`.
+
+    Позволяет отдавать по частям вывод csv.writer и zipfile, которые
+    умеют писать лишь в файл.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(
+            chunk.encode() if isinstance(chunk, str) else chunk
+            for chunk in self.chunks
+        )
+        self.chunks = []
+        return data
+
+
+def export_json(rows):
+    """JSON-массив заметок, по записи за шаг."""
+    separator = '[\n'
+    for row in rows:
+        yield separator + json.dumps(
+            dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False
+        )
+        separator = ',\n'
+    yield '[]\n' if separator == '[\n' else '\n]\n'
+
+
+def export_csv(rows):
+    """CSV с заголовком, по строке за шаг."""
+    buffer = StreamBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.pop()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.pop()
+
+
+def export_markdown_zip(rows):
+    """
+    Zip-архив с заметкой в отдельном файле Markdown.
+
+    В буфер без seek zipfile пишет записи с дескрипторами данных,
+    поэтому каждый файл уходит клиенту сразу после сжатия.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for _, title, text, slug in rows:
+            archive.writestr(f'{slug}.md', f'# {title}\n\n{text}\n')
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+EXPORT_FORMATS = {
+    'json': (export_json, 'application/json', 'json'),
+    'csv': (export_csv, 'text/csv', 'csv'),
+    'md': (export_markdown_zip, 'application/zip', 'zip'),
+}
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notes.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс заметок по таблице notes_note.'
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        self.stdout.write('Поисковый индекс заметок перестроен.')
@@ -1,7 +1,19 @@
+import random
+import re
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast, Substr
 from pytils.translit import slugify
 
+DEFAULT_SLUG = 'note'
+SLUG_SUFFIX_MAX_LENGTH = 11
+# Номера длиннее не учитываются при подборе: Cast в целое на них
+# переполняется, а номер с запасом на +1 всё равно влезает в суффикс.
+SLUG_NUMBER_MAX_DIGITS = SLUG_SUFFIX_MAX_LENGTH - 2
+SLUG_MAX_ATTEMPTS = 5
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -27,11 +39,59 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        ordering = ('id',)
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Если slug не задан, он создаётся из заголовка.
+
+        Сначала пробуем slug без суффикса; если он занят, номер суффикса
+        выбирается одним запросом по индексу slug. Гонку с параллельным
+        запросом, занявшим тот же slug, решает повтор после IntegrityError.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = slugify(self.title)[:max_slug_length] or DEFAULT_SLUG
+        self.slug = base
+        for attempt in range(SLUG_MAX_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_MAX_ATTEMPTS - 1:
+                    raise
+                self.slug = self.get_free_slug(base)
+
+    @classmethod
+    def get_free_slug(cls, base):
+        """
+        Slug вида `<base>-<N>` с номером больше всех занятых.
+
+        Учитываются номера до SLUG_NUMBER_MAX_DIGITS цифр; когда они
+        исчерпаны, номер из SLUG_NUMBER_MAX_DIGITS + 1 цифр выбирается
+        случайно.
+        """
+        max_slug_length = cls._meta.get_field('slug').max_length
+        base = base[:max_slug_length - SLUG_SUFFIX_MAX_LENGTH]
+        prefix = f'{base}-'
+        last_number = cls.objects.filter(
+            slug__gt=prefix, slug__lt=f'{base}.',
+            slug__regex=(
+                rf'^{re.escape(prefix)}[0-9]{{1,{SLUG_NUMBER_MAX_DIGITS}}}$'
+            ),
+        ).annotate(
+            number=Cast(Substr('slug', len(prefix) + 1), IntegerField())
+        ).aggregate(Max('number'))['number__max']
+        number = max(last_number or 1, 1) + 1
+        if number >= 10 ** SLUG_NUMBER_MAX_DIGITS:
+            digits = SLUG_NUMBER_MAX_DIGITS + 1
+            number = random.randrange(10 ** (digits - 1), 10 ** digits)
+        return f'{prefix}{number}'
@@ -0,0 +1,110 @@
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.migrations.loader import MigrationLoader
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 16
+
+SEARCH_SQL = '''
+    SELECT notes_note.id, notes_note.title, notes_note.slug,
+        snippet(notes_note_fts, -1, %s, %s, '…', %s) AS snippet
+    FROM notes_note_fts
+    JOIN notes_note ON notes_note.id = notes_note_fts.rowid
+    WHERE notes_note_fts MATCH %s AND notes_note.author_id = %s
+    ORDER BY bm25(notes_note_fts)
+    LIMIT %s
+'''
+REBUILD_SQL = "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')"
+SEARCH_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text,
+        content='notes_note', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, text
+    ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO notes_note_fts(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+]
+
+
+def build_match_query(query):
+    """
+    Превращает ввод пользователя в запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в тексте
+    запроса не ломали его синтаксис; совпасть должны все слова.
+    """
+    return ' '.join(
+        '"{}"'.format(term.replace('"', '""')) for term in query.split()
+    )
+
+
+def highlight(snippet):
+    """Экранирует фрагмент текста и подсвечивает найденные слова."""
+    return mark_safe(
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
+
+
+def search_notes(author, query, limit):
+    """Заметки автора, подходящие под запрос, от наиболее релевантной."""
+    match_query = build_match_query(query)
+    if not match_query:
+        return []
+    results = list(Note.objects.raw(SEARCH_SQL, (
+        HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS,
+        match_query, author.pk, limit,
+    )))
+    for note in results:
+        note.snippet = highlight(note.snippet)
+    return results
+
+
+def rebuild_search_index():
+    """Заново строит поисковый индекс по таблице заметок."""
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_SQL)
+
+
+def create_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Создаёт поисковый индекс для приложения без миграций.
+
+    Обычно индекс создаёт миграция. Когда миграции отключены
+    (pytest --nomigrations), таблицы строятся по моделям, и индекс
+    создаётся здесь по сигналу post_migrate.
+    """
+    module_name, _ = MigrationLoader.migrations_module(sender.label)
+    database = connections[using]
+    if module_name is not None or (
+        'notes_note_fts' in database.introspection.table_names()
+    ):
+        return
+    with database.cursor() as cursor:
+        for sql in SEARCH_INDEX_SQL:
+            cursor.execute(sql)
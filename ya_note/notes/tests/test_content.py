@@ -1,5 +1,11 @@
+import csv
+import io
+import json
+import zipfile
+from http import HTTPStatus
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from notes.forms import NoteForm
@@ -30,6 +36,8 @@ class TestContent(TestCase):
         cls.notes_list_url = reverse('notes:list')
         cls.notes_add_url = reverse('notes:add')
         cls.notes_edit_url = reverse('notes:edit', args=(cls.note.slug,))
+        cls.notes_search_url = reverse('notes:search')
+        cls.notes_export_url = reverse('notes:export')
 
     def test_notes_list_for_different_users(self):
         clients = ((self.author_client, True), (self.reader_client, False))
@@ -46,3 +54,104 @@ class TestContent(TestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+    def test_notes_list_loads_only_rendered_fields(self):
+        response = self.author_client.get(self.notes_list_url)
+        for note in response.context['object_list']:
+            with self.subTest(note=note):
+                self.assertIn('text', note.get_deferred_fields())
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=1)
+    def test_notes_list_pagination(self):
+        second_note = Note.objects.create(
+            title=self.NOTE_TITLE,
+            text=self.NOTE_TEXT,
+            author=self.author
+        )
+        response = self.author_client.get(self.notes_list_url)
+        self.assertEqual(list(response.context['object_list']), [self.note])
+        next_cursor = response.context['next_cursor']
+        response = self.author_client.get(
+            self.notes_list_url, {'after': next_cursor}
+        )
+        self.assertEqual(
+            list(response.context['object_list']), [second_note]
+        )
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_notes_list_bad_cursor(self):
+        for cursor in ('bad', '-1', str(2 ** 63), '9' * 30):
+            with self.subTest(cursor=cursor):
+                response = self.author_client.get(
+                    self.notes_list_url, {'after': cursor}
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_FOUND
+                )
+
+    def test_search_for_different_users(self):
+        clients = ((self.author_client, [self.note]), (self.reader_client, []))
+        for client, expected_results in clients:
+            with self.subTest():
+                response = client.get(
+                    self.notes_search_url, {'q': self.NOTE_TEXT.upper()}
+                )
+                self.assertEqual(
+                    list(response.context['results']), expected_results
+                )
+
+    def test_search_highlights_and_escapes(self):
+        Note.objects.create(
+            title='Разметка',
+            text='Текст с <script>тегом</script>',
+            author=self.author
+        )
+        response = self.author_client.get(
+            self.notes_search_url, {'q': 'тегом'}
+        )
+        content = response.content.decode()
+        self.assertIn('<mark>тегом</mark>', content)
+        self.assertNotIn('<script>', content)
+
+    def test_export_formats(self):
+        fields = {
+            'id': self.note.id,
+            'title': self.NOTE_TITLE,
+            'text': self.NOTE_TEXT,
+            'slug': self.note.slug,
+        }
+        exports = (
+            ('json', lambda data: json.loads(data), [fields]),
+            (
+                'csv',
+                lambda data: list(csv.DictReader(io.StringIO(data.decode()))),
+                [{name: str(value) for name, value in fields.items()}],
+            ),
+            (
+                'md',
+                lambda data: zipfile.ZipFile(io.BytesIO(data)).read(
+                    f'{self.note.slug}.md'
+                ).decode(),
+                f'# {self.NOTE_TITLE}\n\n{self.NOTE_TEXT}\n',
+            ),
+        )
+        for export_format, parse, expected in exports:
+            with self.subTest(export_format=export_format):
+                response = self.author_client.get(
+                    self.notes_export_url, {'format': export_format}
+                )
+                self.assertTrue(response.streaming)
+                data = b''.join(response.streaming_content)
+                self.assertEqual(parse(data), expected)
+
+    def test_export_contains_only_own_notes(self):
+        response = self.reader_client.get(self.notes_export_url)
+        self.assertEqual(
+            json.loads(b''.join(response.streaming_content)), []
+        )
+
+    def test_export_unknown_format(self):
+        response = self.author_client.get(
+            self.notes_export_url, {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, 404)
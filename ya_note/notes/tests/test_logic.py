@@ -1,12 +1,17 @@
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.template import engines
 from django.test import Client, TestCase
 from django.urls import reverse
 from pytils.translit import slugify
 
 from notes.forms import WARNING
 from notes.models import Note
+from notes.search import search_notes
 
 User = get_user_model()
 
@@ -83,6 +88,95 @@ class TestNoteEditDeleteCreate(TestCase):
         note = Note.objects.last()
         self.assertEqual(note.slug, expected_slug)
 
+    def test_create_notes_with_same_title(self):
+        form_data = self.new_form_data.copy()
+        form_data.pop('slug')
+        for _ in range(3):
+            self.author_client.post(self.add_url, data=form_data)
+        expected_slug = slugify(self.new_form_data['title'])
+        self.assertEqual(
+            list(Note.objects.filter(
+                title=self.NEW_NOTE_TITLE
+            ).values_list('slug', flat=True)),
+            [expected_slug, f'{expected_slug}-2', f'{expected_slug}-3'],
+        )
+
+    def test_free_slug_follows_largest_suffix(self):
+        Note.objects.create(
+            title=self.NEW_NOTE_TITLE,
+            text=self.NEW_NOTE_TEXT,
+            slug=f'{self.NOTE_SLUG}-9',
+            author=self.author,
+        )
+        self.assertEqual(
+            Note.get_free_slug(self.NOTE_SLUG), f'{self.NOTE_SLUG}-10'
+        )
+
+    def test_free_slug_ignores_overflowing_suffix(self):
+        Note.objects.create(
+            title=self.NEW_NOTE_TITLE,
+            text=self.NEW_NOTE_TEXT,
+            slug=f'{self.NOTE_SLUG}-99999999999999999999',
+            author=self.author,
+        )
+        self.assertEqual(
+            Note.get_free_slug(self.NOTE_SLUG), f'{self.NOTE_SLUG}-2'
+        )
+
+    def test_free_slug_random_when_numbers_exhausted(self):
+        Note.objects.create(
+            title=self.NEW_NOTE_TITLE,
+            text=self.NEW_NOTE_TEXT,
+            slug=f'{self.NOTE_SLUG}-999999999',
+            author=self.author,
+        )
+        slug = Note.get_free_slug(self.NOTE_SLUG)
+        self.assertRegex(slug, rf'^{self.NOTE_SLUG}-[1-9][0-9]{{9}}$')
+
+    def test_slug_conflict_error_shows_attempted_slug(self):
+        form_data = self.new_form_data.copy()
+        form_data.pop('slug')
+        Note.objects.create(
+            title=self.NEW_NOTE_TITLE,
+            text=self.NEW_NOTE_TEXT,
+            slug=slugify(self.NEW_NOTE_TITLE),
+            author=self.author,
+        )
+        with mock.patch.object(
+            Note, 'get_free_slug', return_value=self.NOTE_SLUG
+        ):
+            response = self.author_client.post(self.add_url, data=form_data)
+        self.assertFormError(
+            response, 'form', 'slug', errors=(self.NOTE_SLUG + WARNING)
+        )
+
+    def test_search_index_follows_notes(self):
+        self.assertEqual(
+            search_notes(self.author, self.NOTE_TEXT, 10), [self.note]
+        )
+        self.author_client.post(self.edit_url, data=self.new_form_data)
+        self.assertEqual(
+            search_notes(self.author, self.NEW_NOTE_TEXT, 10), [self.note]
+        )
+        self.author_client.post(
+            reverse('notes:delete', args=(self.NEW_NOTE_SLUG,))
+        )
+        self.assertEqual(search_notes(self.author, self.NEW_NOTE_TEXT, 10), [])
+
+    def test_warmup_templates_fills_cached_loader(self):
+        call_command('warmup_templates', stdout=StringIO())
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertLessEqual(
+            {'notes/detail.html', 'includes/header.html'},
+            set(loader.get_template_cache),
+        )
+
+    def test_rebuild_search_index_command(self):
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            search_notes(self.author, self.NOTE_TEXT, 10), [self.note]
+        )
+
     def test_author_can_delete_note(self):
         response = self.author_client.delete(self.delete_url)
         self.assertRedirects(response, self.success_url)
@@ -0,0 +1,325 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.cache import note_cache
+from notes.models import Note
+from yanote.middleware import QueryBudgetExceeded
+
+User = get_user_model()
+
+
+class TestQueryPlans(TestCase):
+    AUTHOR_NAME = 'Author'
+    NOTES_COUNT = 3
+    BAD_PLAN_STEPS = ('USE TEMP B-TREE',)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username=cls.AUTHOR_NAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        Note.objects.bulk_create(
+            Note(
+                title=f'Note {index}',
+                text='Text',
+                slug=f'note-{index}',
+                author=cls.author,
+            )
+            for index in range(cls.NOTES_COUNT)
+        )
+        cls.notes_list_url = reverse('notes:list')
+
+    def get_bad_plan_steps(self, sql):
+        """Шаги плана запроса с полным сканированием или сортировкой."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            steps = [row[-1] for row in cursor.fetchall()]
+        return [
+            step for step in steps
+            if step.startswith('SCAN ') and ' USING ' not in step
+            or any(bad_step in step for bad_step in self.BAD_PLAN_STEPS)
+        ]
+
+    def test_notes_list_uses_indexes(self):
+        first_note_id = Note.objects.order_by('id').values_list(
+            'id', flat=True
+        ).first()
+        for params in ({}, {'after': first_note_id}):
+            with CaptureQueriesContext(connection) as context:
+                self.author_client.get(self.notes_list_url, params)
+            for query in context.captured_queries:
+                with self.subTest(sql=query['sql']):
+                    self.assertEqual(
+                        self.get_bad_plan_steps(query['sql']), []
+                    )
+
+
+class TestQueryBudget(TestCase):
+    AUTHOR_NAME = 'Author'
+    NOTE_SLUG = 'note-slug'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username=cls.AUTHOR_NAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='Note title',
+            text='Note text',
+            slug=cls.NOTE_SLUG,
+            author=cls.author,
+        )
+        cls.add_form_data = {
+            'title': 'New note title',
+            'text': 'New note text',
+            'slug': 'new-note-slug',
+        }
+        cls.edit_form_data = {
+            'title': 'Edited note title',
+            'text': 'Edited note text',
+            'slug': 'edited-note-slug',
+        }
+
+    def setUp(self):
+        """Бюджеты считаются для запросов с прогретыми кэшами."""
+        cache.clear()
+        note_cache.clear_local()
+        self.author_client.get(
+            reverse('notes:detail', args=(self.NOTE_SLUG,))
+        )
+
+    def test_note_views_query_budget(self):
+        edit_url = reverse('notes:edit', args=(self.NOTE_SLUG,))
+        delete_url = reverse('notes:delete', args=(self.NOTE_SLUG,))
+        budgets = (
+            ('get', reverse('notes:add'), None, 1),
+            ('post', reverse('notes:add'), self.add_form_data, 5),
+            ('get', edit_url, None, 1),
+            ('get', delete_url, None, 1),
+            ('post', edit_url, self.edit_form_data, 5),
+        )
+        for method, url, data, expected_queries in budgets:
+            with self.subTest(method=method, url=url):
+                request = getattr(self.author_client, method)
+                with self.assertNumQueries(expected_queries):
+                    request(url, data)
+
+    def test_note_delete_query_budget(self):
+        delete_url = reverse('notes:delete', args=(self.NOTE_SLUG,))
+        with self.assertNumQueries(2):
+            self.author_client.post(delete_url)
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_STRICT=True)
+class TestQueryBudgetMiddleware(TestCase):
+    AUTHOR_NAME = 'Author'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username=cls.AUTHOR_NAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.notes_list_url = reverse('notes:list')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client.get(reverse('notes:home'))
+
+    def test_server_timing_header(self):
+        response = self.author_client.get(self.notes_list_url)
+        self.assertTrue(response['Server-Timing'].startswith('db;dur='))
+
+    def test_server_timing_counts_queries(self):
+        response = self.author_client.get(self.notes_list_url)
+        self.assertIn('2 queries', response['Server-Timing'])
+
+    @override_settings(QUERY_BUDGETS={'notes:list': 0})
+    def test_query_budget_exceeded(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.author_client.get(self.notes_list_url)
+
+    @override_settings(QUERY_BUDGETS={'notes:export': 0})
+    def test_query_budget_counts_streaming_queries(self):
+        response = self.author_client.get(reverse('notes:export'))
+        with self.assertRaises(QueryBudgetExceeded):
+            b''.join(response.streaming_content)
+
+    @override_settings(
+        QUERY_BUDGET_ENABLED=False, QUERY_BUDGETS={'notes:list': 0}
+    )
+    def test_query_budget_disabled(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(self.notes_list_url)
+        self.assertNotIn('Server-Timing', response)
+
+
+@override_settings(AUTH_USER_CACHE=True)
+class TestAuthCache(TestCase):
+    AUTHOR_NAME = 'Author'
+    AUTH_TABLES = ('django_session', 'auth_user')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username=cls.AUTHOR_NAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.notes_list_url = reverse('notes:list')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(self.notes_list_url)
+        self.assertContains(response, self.author.username)
+        return [
+            query['sql'] for query in queries
+            if any(table in query['sql'] for table in self.AUTH_TABLES)
+        ]
+
+    def test_warm_request_skips_auth_queries(self):
+        self.assertEqual(len(self.get_auth_queries()), 2)
+        self.assertEqual(self.get_auth_queries(), [])
+
+    def test_cached_user_invalidated_on_change(self):
+        self.get_auth_queries()
+        self.author.username = 'Renamed'
+        self.author.save()
+        self.assertEqual(len(self.get_auth_queries()), 1)
+
+    @override_settings(AUTH_USER_CACHE=False)
+    def test_user_cache_disabled(self):
+        self.get_auth_queries()
+        self.assertEqual(len(self.get_auth_queries()), 1)
+
+
+class TestNoteConditionalGet(TestCase):
+    AUTHOR_NAME = 'Author'
+    NOTE_SLUG = 'note-slug'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username=cls.AUTHOR_NAME)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='Note title',
+            text='Note text',
+            slug=cls.NOTE_SLUG,
+            author=cls.author,
+        )
+        cls.detail_url = reverse('notes:detail', args=(cls.NOTE_SLUG,))
+
+    def test_note_not_modified(self):
+        etag = self.author_client.get(self.detail_url)['ETag']
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(response.content)
+
+    def test_note_etag_changes_with_content(self):
+        etag = self.author_client.get(self.detail_url)['ETag']
+        self.note.text = 'New note text'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note.save()
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class TestNoteObjectCache(TestCase):
+    NOTE_SLUG = 'note-slug'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Author')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader = User.objects.create(username='Reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.note = Note.objects.create(
+            title='Note title',
+            text='Note text',
+            slug=cls.NOTE_SLUG,
+            author=cls.author,
+        )
+        cls.detail_url = reverse('notes:detail', args=(cls.NOTE_SLUG,))
+
+    def setUp(self):
+        cache.clear()
+        note_cache.clear_local()
+
+    def test_warm_note_detail_skips_queries(self):
+        self.author_client.get(self.detail_url)
+        with self.assertNumQueries(1):
+            response = self.author_client.get(self.detail_url)
+        self.assertEqual(response.context['object'], self.note)
+
+    def test_cached_note_hidden_from_other_users(self):
+        self.author_client.get(self.detail_url)
+        response = self.reader_client.get(self.detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cached_note_invalidated_on_change(self):
+        self.author_client.get(self.detail_url)
+        self.note.text = 'New note text'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.note.save()
+        response = self.author_client.get(self.detail_url)
+        self.assertEqual(response.context['object'].text, 'New note text')
+
+    def test_cached_note_invalidated_after_commit(self):
+        self.author_client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Note.objects.filter(pk=self.note.pk).update(text='New note text')
+            note_cache.invalidate(self.note.pk)
+            note_cache.clear_local()
+            response = self.author_client.get(self.detail_url)
+            self.assertEqual(response.context['object'].text, 'Note text')
+        response = self.author_client.get(self.detail_url)
+        self.assertEqual(response.context['object'].text, 'New note text')
+
+
+class TestNoteAdmin(TestCase):
+    CHANGELIST_URL = reverse('admin:notes_note_changelist')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='Admin')
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+    def create_notes(self, count):
+        for _ in range(count):
+            author = User.objects.create(
+                username=f'Author {User.objects.count()}'
+            )
+            Note.objects.create(title='Title', text='Text', author=author)
+
+    def get_changelist_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.admin_client.get(self.CHANGELIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_independent_of_authors(self):
+        self.create_notes(1)
+        self.admin_client.get(self.CHANGELIST_URL)
+        expected_queries = self.get_changelist_queries()
+        self.create_notes(10)
+        self.assertEqual(self.get_changelist_queries(), expected_queries)
+
+    def test_author_uses_autocomplete(self):
+        response = self.admin_client.get(reverse('admin:notes_note_add'))
+        self.assertContains(response, 'admin-autocomplete')
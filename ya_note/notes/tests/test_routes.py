@@ -33,6 +33,8 @@ class TestRoutes(TestCase):
             ('notes:list', None),
             ('notes:add', None),
             ('notes:success', None),
+            ('notes:search', None),
+            ('notes:export', None),
         )
         cls.urls_for_author = (
             ('notes:edit', (cls.note.slug,)),
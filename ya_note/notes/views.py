@@ -1,9 +1,21 @@
+from hashlib import md5
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import NoteForm
+from .cache import note_cache
+from .export import EXPORT_FIELDS, EXPORT_FORMATS
+from .forms import WARNING, NoteForm
 from .models import Note
+from .search import search_notes
+
+MAX_NOTE_ID = 2 ** 63 - 1
 
 
 class Home(generic.TemplateView):
@@ -16,6 +28,14 @@ class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     template_name = 'notes/success.html'
 
 
+def get_note_or_404(user, slug):
+    """Заметка пользователя из кэша объектов."""
+    note = note_cache.get('slug', slug)
+    if note is None or note.author_id != user.pk:
+        raise Http404('Заметка не найдена.')
+    return note
+
+
 class NoteBase(LoginRequiredMixin):
     """Базовый класс для остальных CBV."""
     model = Note
@@ -25,23 +45,40 @@ class NoteBase(LoginRequiredMixin):
         """Пользователь может работать только со своими заметками."""
         return self.model.objects.filter(author=self.request.user)
 
+    def get_object(self, queryset=None):
+        """Заметка берётся из кэша объектов."""
+        return get_note_or_404(self.request.user, self.kwargs['slug'])
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+
+class NoteFormMixin:
+    """Общая обработка формы создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Slug мог занять параллельный запрос уже после проверки формы.
+
+        В этом случае показываем ту же ошибку, что и при проверке.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -50,10 +87,102 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
-    template_name = 'notes/list.html'
+    """
+    Список всех заметок пользователя.
 
+    Заметки выводятся страницами после курсора `?after=<id>`; загружаются
+    только поля, которые показывает шаблон.
+    """
+    template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """
+        Заметки с id больше курсора и ещё одна сверх страницы.
+
+        Размер страницы определяется в настройках проекта; лишняя
+        заметка показывает, что есть следующая страница.
+        """
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        after = self.request.GET.get('after')
+        if after:
+            try:
+                after = int(after)
+            except ValueError:
+                raise Http404('Некорректный курсор заметок.')
+            if not 0 <= after <= MAX_NOTE_ID:
+                raise Http404('Некорректный курсор заметок.')
+            queryset = queryset.filter(id__gt=after)
+        return queryset[:settings.NOTES_COUNT_ON_LIST_PAGE + 1]
+
+    def get_context_data(self, **kwargs):
+        """Отрезает заметку сверх страницы и ставит курсор следующей."""
+        page_size = settings.NOTES_COUNT_ON_LIST_PAGE
+        notes = list(self.object_list)
+        next_cursor = None
+        if len(notes) > page_size:
+            notes = notes[:page_size]
+            next_cursor = notes[-1].id
+        context = super().get_context_data(object_list=notes, **kwargs)
+        context['next_cursor'] = next_cursor
+        return context
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        """
+        Выводим заметки, подходящие под запрос `?q=`, по релевантности.
+
+        Пользователь ищет только среди своих заметок.
+        """
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['results'] = search_notes(
+            self.request.user, query, settings.SEARCH_RESULTS_COUNT
+        )
+        return context
+
+
+class NoteExport(NoteBase, generic.View):
+    """Выгрузка всех заметок пользователя в формате `?format=`."""
+
+    def get(self, request):
+        """
+        Заметки читаются из базы пачками и сразу уходят клиенту.
+
+        Экспорт не держит в памяти ни всех заметок, ни всего ответа.
+        """
+        export_format = request.GET.get('format', 'json')
+        if export_format not in EXPORT_FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        export, content_type, extension = EXPORT_FORMATS[export_format]
+        rows = self.get_queryset().order_by('id').values_list(
+            *EXPORT_FIELDS
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            export(rows), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{extension}"'
+        )
+        return response
+
+
+def note_etag(request, slug):
+    """ETag заметки — хэш её содержимого, без рендеринга страницы."""
+    note = note_cache.get('slug', slug)
+    if note is None or note.author_id != request.user.pk:
+        return None
+    content = (note.id, note.title, note.text, note.slug)
+    return md5(repr(content).encode()).hexdigest()
+
+
+@method_decorator(condition(etag_func=note_etag), name='get')
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
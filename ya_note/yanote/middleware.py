@@ -0,0 +1,91 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем разрешено."""
+
+
+class QueryCounter:
+    """Считает запросы к базе и время их выполнения."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class QueryBudgetMiddleware:
+    """
+    Следит за числом SQL-запросов на каждый запрос к сайту.
+
+    Включается настройкой QUERY_BUDGET_ENABLED. Время работы с базой
+    отдаётся в заголовке Server-Timing, бюджеты задаются в настройке
+    QUERY_BUDGETS по имени URL. При превышении пишется предупреждение
+    в лог, а при QUERY_BUDGET_STRICT = True поднимается
+    QueryBudgetExceeded.
+
+    Запросы потокового ответа (выгрузки заметок) выполняются после
+    отправки заголовков: в Server-Timing их нет, но бюджет проверяется
+    после выдачи всего ответа.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response['Server-Timing'] = (
+            f'db;dur={counter.duration * 1000:.1f};'
+            f'desc="{counter.count} queries"'
+        )
+        if response.streaming:
+            response.streaming_content = self.count_streaming_queries(
+                request, response.streaming_content, counter
+            )
+        else:
+            self.check_budget(request, counter.count)
+        return response
+
+    def count_streaming_queries(self, request, content, counter):
+        """Отдаёт части ответа, считая запросы, выполненные для них."""
+        content = iter(content)
+        while True:
+            with connection.execute_wrapper(counter):
+                part = next(content, None)
+            if part is None:
+                break
+            yield part
+        self.check_budget(request, counter.count)
+
+    def check_budget(self, request, count):
+        match = request.resolver_match
+        if match is None:
+            return
+        budget = settings.QUERY_BUDGETS.get(match.view_name)
+        if budget is None or count <= budget:
+            return
+        message = (
+            f'{match.view_name}: {count} SQL-запросов '
+            f'при бюджете {budget} ({request.method} {request.path})'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
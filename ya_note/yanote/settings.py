@@ -22,6 +22,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,12 +34,21 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yanote.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -54,11 +64,52 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yanote.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        # Тестовая база в памяти: у каждого процесса pytest-xdist своя.
+        'TEST': {'NAME': ':memory:'},
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 5000,
+                'cache_size': -64 * 1024,
+                'mmap_size': 256 * 1024 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# cached_db читает сессию из кэша и обращается к базе только при промахе.
+# С 'django.contrib.sessions.backends.cache' сессии живут только в
+# LocMemCache — LRU-кэше в памяти процесса — и теряются при перезапуске.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+
+# Пользователи в кэше (notes.auth.CachedModelBackend). Включайте только
+# с общим кэшем (Memcached, Redis): с LocMemCache каждый процесс хранит
+# свою копию, и изменения пользователя, в том числе блокировка, не видны
+# другим процессам до AUTH_USER_CACHE_TIMEOUT.
+AUTH_USER_CACHE = False
+
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Кэш объектов: LRU в памяти процесса перед общим кэшем Django.
+OBJECT_CACHE_LOCAL_SIZE = 1000
+
+OBJECT_CACHE_LOCAL_TIMEOUT = 5
+
+OBJECT_CACHE_TIMEOUT = 60 * 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +138,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+
+SEARCH_RESULTS_COUNT = 20
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Списки админки не считают COUNT(*) по большим таблицам, см.
+# yanote.paginator.EstimatedCountPaginator.
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+# Подсчёт запросов и проверка QUERY_BUDGETS middleware QueryBudgetMiddleware
+# нужны при разработке и в тестах, в боевом режиме middleware отключается.
+QUERY_BUDGET_ENABLED = DEBUG
+
+QUERY_BUDGETS = {
+    'notes:list': 3,
+    'notes:detail': 4,
+    'notes:add': 6,
+    'notes:edit': 7,
+    'notes:delete': 4,
+    'notes:search': 3,
+    'notes:export': 2,
+}
+
+QUERY_BUDGET_STRICT = False